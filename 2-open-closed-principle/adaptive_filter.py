@@ -0,0 +1,127 @@
+from collections import defaultdict
+from itertools import chain, islice
+import time
+
+from ocp import (
+    AndSpecification,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    Size,
+    SizeSpecification,
+    conjuncts,
+)
+
+
+class SpecificationStatistics:
+    """
+    Cost and selectivity of each specification, measured when the items
+    are filtered.
+
+    The statistics are kept between filters, so the specifications used
+    before are not measured again.
+    """
+    def __init__(self):
+        self.items = defaultdict(int)
+        self.passed = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def __contains__(self, spec):
+        return self.items.get(spec, 0) > 0
+
+    def record(self, spec, items):
+        """
+        Checks the items against the specification and records the results.
+
+        Args:
+            items: a list, so it can be iterated after recording.
+        """
+        is_satisfied = spec.compile()
+        start = time.perf_counter()
+        passed = sum(1 for _ in filter(is_satisfied, items))
+        self.seconds[spec] += time.perf_counter() - start
+        self.items[spec] += len(items)
+        self.passed[spec] += passed
+
+    def cost(self, spec):
+        """
+        Returns:
+            Seconds per item.
+        """
+        return self.seconds[spec] / self.items[spec]
+
+    def selectivity(self, spec):
+        """
+        Returns:
+            Fraction of the items that satisfy the specification.
+        """
+        return self.passed[spec] / self.items[spec]
+
+    def rank(self, spec):
+        """
+        Sorting conjuncts by rank minimises the expected cost of an `and`:
+        cheap specifications that discard lots of items go first.
+        """
+        rejected = 1 - self.selectivity(spec)
+        if rejected == 0:
+            return float('inf')
+        return self.cost(spec) / rejected
+
+
+class AdaptiveFilter(Filter):
+    """
+    Reorders the conjuncts of the specification so the cheapest and most
+    selective ones are checked first.
+
+    The first `sample_size` items are used to measure the conjuncts
+    without statistics.
+    """
+    def __init__(self, statistics=None, sample_size=1000):
+        self.statistics = statistics or SpecificationStatistics()
+        self.sample_size = sample_size
+        self.last_plan = None
+
+    def filter(self, items, spec):
+        items = iter(items)
+        sample = list(islice(items, self.sample_size))
+        for conjunct in conjuncts(spec):
+            if conjunct not in self.statistics and sample:
+                self.statistics.record(conjunct, sample)
+        self.last_plan = self.plan(spec)
+        planned_spec = AndSpecification(*self.last_plan)
+        yield from filter(planned_spec.compile(), chain(sample, items))
+
+    def plan(self, spec):
+        """
+        Returns:
+            The conjuncts in the order they are checked.
+        """
+        specs = conjuncts(spec)
+        known = [c for c in specs if c in self.statistics]
+        unknown = [c for c in specs if c not in self.statistics]
+        return sorted(known, key=self.statistics.rank) + unknown
+
+    def explain(self, spec):
+        lines = []
+        for position, conjunct in enumerate(self.plan(spec), 1):
+            line = f'{position}. {conjunct!r}'
+            if conjunct in self.statistics:
+                line += f' cost: {self.statistics.cost(conjunct) * 1e9:.0f} ns,' \
+                        f' selectivity: {self.statistics.selectivity(conjunct):.1%}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    products = create_products(100_000)
+    adaptive_filter = AdaptiveFilter()
+    spec = NameSpecification("house") & ColorSpecification(Color.BLUE) \
+        & SizeSpecification(Size.LARGE)
+
+    count = sum(1 for _ in adaptive_filter.filter(products, spec))
+    print(f'Large blue house items: {count}')
+    print(adaptive_filter.explain(spec))
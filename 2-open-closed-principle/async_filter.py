@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from ocp import (
+    Color,
+    ColorSpecification,
+    Filter,
+    Size,
+    SizeSpecification,
+)
+from spec_codec import PlanCache, encode
+
+# Compiled specifications of the processes of a `ProcessPoolExecutor`.
+predicates = PlanCache(allow_pickle=True)
+
+
+def filter_batch(batch, is_satisfied):
+    return [item for item in batch if is_satisfied(item)]
+
+
+def filter_encoded_batch(batch, encoded_spec):
+    """
+    Runs in the processes of a `ProcessPoolExecutor`, where the compiled
+    specification can't be sent. It's sent encoded (see `spec_codec.py`)
+    and compiled once per process.
+    """
+    return filter_batch(batch, predicates.predicate(encoded_spec))
+
+
+class AsyncFilter(Filter):
+    """
+    Filters the items of an async iterable, yielding the results as an async
+    generator.
+
+    Checking one item is too fast to be sent to another thread, so with
+    `batch_size` the items are checked in batches and, with `executor`, the
+    batches are checked in the executor instead of blocking the event loop.
+    """
+    def __init__(self, batch_size=None, executor=None):
+        """
+        Args:
+            batch_size: items checked at once. If None, each item is checked
+                when it's received.
+            executor: `concurrent.futures.Executor` where the batches are
+                checked. If None, they are checked in the event loop. With a
+                `ProcessPoolExecutor` the results are copies of the items.
+        """
+        self.batch_size = batch_size
+        self.executor = executor
+
+    async def filter(self, items, spec):
+        """
+        Args:
+            items: async iterable.
+            spec: specification. See `Specification` class.
+        """
+        if self.batch_size is None:
+            is_satisfied = spec.compile()
+            async for item in items:
+                if is_satisfied(item):
+                    yield item
+            return
+        if isinstance(self.executor, ProcessPoolExecutor):
+            function, argument = filter_encoded_batch, encode(spec, allow_pickle=True)
+        else:
+            function, argument = filter_batch, spec.compile()
+        batch = []
+        async for item in items:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                for result in await self._filter_batch(function, batch, argument):
+                    yield result
+                batch = []
+        if batch:
+            for result in await self._filter_batch(function, batch, argument):
+                yield result
+
+    async def _filter_batch(self, function, batch, argument):
+        if self.executor is None:
+            return function(batch, argument)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, batch, argument)
+
+    # The `Filter` operations are coroutines too.
+
+    async def first(self, items, spec, n):
+        results = []
+        if n <= 0:
+            return results
+        async for item in self.filter(items, spec):
+            results.append(item)
+            if len(results) == n:
+                break
+        return results
+
+    async def count(self, items, spec):
+        count = 0
+        async for _ in self.filter(items, spec):
+            count += 1
+        return count
+
+    async def exists(self, items, spec):
+        async for _ in self.filter(items, spec):
+            return True
+        return False
+
+
+if __name__ == "__main__":
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from benchmark import create_products
+
+    async def product_pages(products, page_size=1000):
+        """
+        Simulates a paginated service that returns the products.
+        """
+        for start in range(0, len(products), page_size):
+            await asyncio.sleep(0)
+            for product in products[start:start + page_size]:
+                yield product
+
+    async def main():
+        products = create_products(100_000)
+        large_blue = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+        with ThreadPoolExecutor() as executor:
+            async_filter = AsyncFilter(batch_size=5000, executor=executor)
+            count = await async_filter.count(product_pages(products), large_blue)
+        print(f'Large blue products: {count}')
+
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+import argparse
+import json
+import platform
+import random
+import time
+
+from ocp import (
+    AndSpecification,
+    AndSpecificationWorse,
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    NameSpecification,
+    Product,
+    ProductFilter,
+    Size,
+    SizeSpecification,
+)
+
+# Benchmarks of the `ocp.py` filters. Run `python benchmark.py --help`.
+
+NAMES = ['Apple', 'Tree', 'House', 'Car', 'Phone', 'Chair']
+DEPTHS = [2, 4, 8, 16, 32]
+
+
+def create_products(count, seed=0):
+    rng = random.Random(seed)
+    colors = list(Color)
+    sizes = list(Size)
+    return [
+        Product(rng.choice(NAMES), rng.choice(colors), rng.choice(sizes))
+        for _ in range(count)
+    ]
+
+
+def time_per_item(function, products, repeat=3):
+    """
+    Returns:
+        The best time, in nanoseconds, that `function` needs for each product.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(products)
+        best = min(best, time.perf_counter() - start)
+    return best / len(products) * 1e9
+
+
+def count_with_is_satisfied(spec):
+    # The loop used by `BetterFilter` before specifications were compiled.
+    def count(products):
+        return sum(1 for p in products if spec.is_satisfied(p))
+    return count
+
+
+def count_with_better_filter(spec):
+    def count(products):
+        return sum(1 for _ in BetterFilter().filter(products, spec))
+    return count
+
+
+def count_with_product_filter(method, *args):
+    def count(products):
+        return sum(1 for _ in method(products, *args))
+    return count
+
+
+def always_satisfied():
+    """
+    Specification satisfied by all the products, so every level of a
+    chain is checked.
+    """
+    return ~NameSpecification('')
+
+
+def worse_chain(depth):
+    spec = always_satisfied()
+    for _ in range(depth - 1):
+        spec = AndSpecificationWorse(spec, always_satisfied())
+    return spec
+
+
+def benchmarks():
+    """
+    Returns:
+        A dict with the benchmark names and the functions to time.
+    """
+    product_filter = ProductFilter()
+    large = SizeSpecification(Size.LARGE)
+    blue = ColorSpecification(Color.BLUE)
+    house = NameSpecification("house")
+    result = {
+        'ProductFilter.filter_by_color': count_with_product_filter(
+            product_filter.filter_by_color, Color.BLUE),
+        'ProductFilter.filter_by_size': count_with_product_filter(
+            product_filter.filter_by_size, Size.LARGE),
+        'ProductFilter.filter_by_size_and_color': count_with_product_filter(
+            product_filter.filter_by_size_and_color, Size.LARGE, Color.BLUE),
+        'BetterFilter color': count_with_better_filter(blue),
+        'BetterFilter size': count_with_better_filter(large),
+        'BetterFilter name': count_with_better_filter(house),
+        'is_satisfied name': count_with_is_satisfied(house),
+        'BetterFilter large & blue & house': count_with_better_filter(
+            large & blue & house),
+        'is_satisfied large & blue & house': count_with_is_satisfied(
+            large & blue & house),
+    }
+    for depth in DEPTHS:
+        spec = AndSpecification(*(always_satisfied() for _ in range(depth)))
+        result[f'BetterFilter AndSpecification depth {depth}'] = \
+            count_with_better_filter(spec)
+        result[f'is_satisfied AndSpecification depth {depth}'] = \
+            count_with_is_satisfied(spec)
+        spec = worse_chain(depth)
+        result[f'BetterFilter AndSpecificationWorse depth {depth}'] = \
+            count_with_better_filter(spec)
+        result[f'is_satisfied AndSpecificationWorse depth {depth}'] = \
+            count_with_is_satisfied(spec)
+    return result
+
+
+def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        products = create_products(size)
+        for name, function in benchmarks().items():
+            ns_per_item = time_per_item(function, products, repeat)
+            results.append({'benchmark': name, 'products': size,
+                            'ns_per_item': ns_per_item})
+            print(f'{size:>10} {name:50} {ns_per_item:9.1f} ns')
+    return {
+        'python': platform.python_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Prints the benchmarks slower than in the baseline report.
+
+    Returns:
+        The number of regressions.
+    """
+    previous = {
+        (r['benchmark'], r['products']): r['ns_per_item']
+        for r in baseline['results']
+    }
+    regressions = 0
+    for r in report['results']:
+        before = previous.get((r['benchmark'], r['products']))
+        if before and r['ns_per_item'] > before * (1 + threshold):
+            regressions += 1
+            print(f'Regression: {r["benchmark"]} ({r["products"]} products) '
+                  f'{before:.1f} ns -> {r["ns_per_item"]:.1f} ns')
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmarks of ocp.py')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+        help='number of products of each catalog, up to 10000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', help='report to compare with')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='slowdown reported as a regression, 0.1 is 10%%')
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Results saved in {args.output}')
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        raise SystemExit(1 if regressions else 0)
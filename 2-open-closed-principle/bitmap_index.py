@@ -0,0 +1,191 @@
+from functools import singledispatch
+import time
+
+from ocp import (
+    AndSpecification,
+    AndSpecificationWorse,
+    Color,
+    ColorSpecification,
+    Filter,
+    NotSpecification,
+    OrSpecification,
+    Size,
+    SizeSpecification,
+)
+
+# Note. A bitmap is a Python `int` where the bit `i` is 1 if the row `i`
+# satisfies a criteria. The bitwise operators of `int` work with all the bits
+# at once and `int.bit_count` is a popcount, so we do not iterate the rows.
+
+
+def iter_bits(bitmap):
+    """
+    Yields the positions of the bits set to 1, in ascending order.
+    """
+    bits = bin(bitmap)[:1:-1]  # Without '0b' and lowest bit first.
+    position = bits.find('1')
+    while position != -1:
+        yield position
+        position = bits.find('1', position + 1)
+
+
+class BitmapIndex:
+    """
+    Keeps a bitmap for each `Color` and `Size` member over the product rows.
+
+    Rows are never reused, a deleted row is removed from all the bitmaps and
+    from the `live` bitmap. The bitmaps are stored as `bytearray`s so a bit
+    can be changed without copying the bitmap.
+
+    The bitmaps are not compressed: a bit per row and bitmap, 7 bitmaps
+    (live, 3 colors, 3 sizes) use less than a byte per row, and they are
+    combined with the `int` operators without decompressing them.
+    """
+    def __init__(self, products=()):
+        self.products = []
+        self.live = bytearray()
+        self.color_bitmaps = {color: bytearray() for color in Color}
+        self.size_bitmaps = {size: bytearray() for size in Size}
+        for product in products:
+            self.insert(product)
+
+    def __len__(self):
+        return self.live_bitmap().bit_count()
+
+    def _bitmaps(self):
+        return (
+            self.live,
+            *self.color_bitmaps.values(),
+            *self.size_bitmaps.values(),
+        )
+
+    def insert(self, product):
+        """
+        Returns:
+            The row of the product.
+        """
+        row = len(self.products)
+        self.products.append(product)
+        if row % 8 == 0:
+            for bitmap in self._bitmaps():
+                bitmap.append(0)
+        byte, bit = divmod(row, 8)
+        self.live[byte] |= 1 << bit
+        self.color_bitmaps[product.color][byte] |= 1 << bit
+        self.size_bitmaps[product.size][byte] |= 1 << bit
+        return row
+
+    def delete(self, row):
+        product = self.products[row]
+        self.products[row] = None
+        byte, bit = divmod(row, 8)
+        for bitmap in self._bitmaps():
+            bitmap[byte] &= ~(1 << bit)
+        return product
+
+    def live_bitmap(self):
+        return int.from_bytes(self.live, 'little')
+
+    def color_bitmap(self, color):
+        return int.from_bytes(self.color_bitmaps[color], 'little')
+
+    def size_bitmap(self, size):
+        return int.from_bytes(self.size_bitmaps[size], 'little')
+
+
+@singledispatch
+def bitmap(spec, index):
+    """
+    Returns:
+        The bitmap of the index rows that satisfy the specification.
+
+    New specifications can be answered with bitmaps with `@bitmap.register`;
+    the ones not registered are checked row by row.
+    """
+    is_satisfied = spec.compile()
+    # Bits are set in a `bytearray`, setting them in an `int` would copy it
+    # for each row.
+    result = bytearray(len(index.live))
+    for row in iter_bits(index.live_bitmap()):
+        if is_satisfied(index.products[row]):
+            result[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(result, 'little')
+
+
+@bitmap.register
+def _(spec: ColorSpecification, index):
+    return index.color_bitmap(spec.color)
+
+
+@bitmap.register
+def _(spec: SizeSpecification, index):
+    return index.size_bitmap(spec.size)
+
+
+@bitmap.register
+def _(spec: AndSpecification, index):
+    result = index.live_bitmap()
+    for child in spec.args:
+        result &= bitmap(child, index)
+    return result
+
+
+@bitmap.register
+def _(spec: AndSpecificationWorse, index):
+    return bitmap(spec.spec1, index) & bitmap(spec.spec2, index)
+
+
+@bitmap.register
+def _(spec: OrSpecification, index):
+    result = 0
+    for child in spec.args:
+        result |= bitmap(child, index)
+    return result
+
+
+@bitmap.register
+def _(spec: NotSpecification, index):
+    # AND NOT: the deleted rows are not in the live bitmap.
+    return index.live_bitmap() & ~bitmap(spec.spec, index)
+
+
+class BitmapFilter(Filter):
+    """
+    Filters a `BitmapIndex` with the bitmaps of the specifications.
+    """
+    def filter(self, items, spec):
+        """
+        Args:
+            items: a `BitmapIndex`.
+            spec: specification. See `Specification` class.
+        """
+        for row in iter_bits(bitmap(spec, items)):
+            yield items.products[row]
+
+    def count(self, items, spec):
+        return bitmap(spec, items).bit_count()
+
+    def exists(self, items, spec):
+        return bitmap(spec, items) != 0
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    products = create_products(1_000_000)
+    index = BitmapIndex(products)
+    bitmap_filter = BitmapFilter()
+
+    large = SizeSpecification(Size.LARGE)
+    blue = ColorSpecification(Color.BLUE)
+    start = time.perf_counter()
+    count = bitmap_filter.count(index, large & ~blue | ColorSpecification(Color.RED))
+    print(f'Large not blue, or red: {count} products '
+          f'in {time.perf_counter() - start:.4f} s')
+
+    index.delete(0)
+    print(f'Products after deleting one: {len(index)}')
+
+    dense = sum(len(bitmap) for bitmap in index.color_bitmaps.values())
+    print(f'Color bitmaps: {dense} bytes')
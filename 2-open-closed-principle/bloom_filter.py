@@ -0,0 +1,138 @@
+from hashlib import blake2b
+import math
+
+from ocp import (
+    BetterFilter,
+    Color,
+    Filter,
+    NameSpecification,
+    Product,
+    Size,
+    conjuncts,
+)
+
+
+class CountingBloomFilter:
+    """
+    Set of strings that can answer "not in the set" without storing them.
+
+    A string is in the set if its `hashes` counters are not 0, so it can say
+    that a string is in the set when it isn't (a false positive) but never
+    the opposite. The counters allow removing strings; a counter that
+    reaches 255 is not changed anymore, so removing never causes false
+    negatives.
+    """
+    MAX_COUNT = 255
+
+    def __init__(self, capacity, false_positive_rate=0.01):
+        """
+        Args:
+            capacity: expected number of strings added.
+            false_positive_rate: probability of a false positive when the
+                filter has `capacity` strings.
+        """
+        capacity = max(capacity, 1)
+        self.size = math.ceil(
+            -capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.counters = bytearray(self.size)
+
+    def _positions(self, string):
+        digest = blake2b(string.encode(), digest_size=16).digest()
+        hash1 = int.from_bytes(digest[:8], 'little')
+        hash2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(hash1 + i * hash2) % self.size for i in range(self.hashes)]
+
+    def add(self, string):
+        for position in self._positions(string):
+            if self.counters[position] < self.MAX_COUNT:
+                self.counters[position] += 1
+
+    def remove(self, string):
+        """
+        Removes a string that was added before.
+        """
+        for position in self._positions(string):
+            if 0 < self.counters[position] < self.MAX_COUNT:
+                self.counters[position] -= 1
+
+    def __contains__(self, string):
+        return all(self.counters[position] for position in self._positions(string))
+
+
+class BloomNameFilter(Filter):
+    """
+    Returns no items, without iterating them, when the specification needs a
+    name that no product has. Else, the items are filtered with another
+    filter.
+
+    The names are lower-cased, as `NameSpecification` compares them. When
+    the products change, `add` and `remove` must be called.
+    """
+    def __init__(self, products=(), capacity=None, false_positive_rate=0.01,
+                 filter=None):
+        """
+        Args:
+            products: the products whose names are added.
+            capacity: expected number of names. If None, the number of
+                products, so the false positive rate is kept until more
+                products are added.
+            false_positive_rate: see `CountingBloomFilter`.
+            filter: filter used when the names are found.
+        """
+        if capacity is None:
+            if not hasattr(products, '__len__'):
+                products = list(products)
+            capacity = len(products)
+        self.names = CountingBloomFilter(capacity, false_positive_rate)
+        self.unfiltered_filter = filter or BetterFilter()
+        self.queries = 0
+        self.avoided_scans = 0
+        for product in products:
+            self.add(product)
+
+    def add(self, product):
+        self.names.add(product.name.lower())
+
+    def remove(self, product):
+        self.names.remove(product.name.lower())
+
+    def _impossible(self, spec):
+        self.queries += 1
+        for conjunct in conjuncts(spec):
+            if isinstance(conjunct, NameSpecification) \
+                    and conjunct.name.lower() not in self.names:
+                self.avoided_scans += 1
+                return True
+        return False
+
+    def filter(self, items, spec):
+        if self._impossible(spec):
+            return iter(())
+        return self.unfiltered_filter.filter(items, spec)
+
+    def count(self, items, spec):
+        if self._impossible(spec):
+            return 0
+        return self.unfiltered_filter.count(items, spec)
+
+    def exists(self, items, spec):
+        if self._impossible(spec):
+            return False
+        return self.unfiltered_filter.exists(items, spec)
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    products = create_products(100_000)
+    bloom_filter = BloomNameFilter(products, capacity=1000)
+    for name in ['house', 'boat', 'plane', 'tree', 'lamp']:
+        count = bloom_filter.count(products, NameSpecification(name))
+        print(f'{name}: {count} products')
+    print(f'Scans avoided: {bloom_filter.avoided_scans} of {bloom_filter.queries}')
+
+    house = Product('Houseboat', Color.BLUE, Size.LARGE)
+    bloom_filter.add(house)
+    print(f'Houseboat after adding it: {bloom_filter.exists([house], NameSpecification("houseboat"))}')
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+from indexed_filter import IndexedProductCatalog
+from ocp import (
+    Color,
+    ColorSpecification,
+    Filter,
+    Product,
+    Size,
+    SizeSpecification,
+)
+from planner import PlannedFilter
+
+
+class CachingFilter(Filter):
+    """
+    Remembers the results of the last specifications used to filter a
+    catalog.
+
+    Specifications are compared by structure, so
+    `large & ColorSpecification(Color.BLUE)` created again uses the same
+    results. The results are discarded when the catalog `version` changes,
+    so the products must be modified with the catalog methods.
+    """
+    def __init__(self, catalog, filter=None, max_size=128):
+        """
+        Args:
+            catalog: the `IndexedProductCatalog` whose results are cached.
+            filter: used when the results are not cached.
+            max_size: number of specifications whose results are kept; the
+                least recently used are discarded first.
+        """
+        self.catalog = catalog
+        self.uncached_filter = filter or PlannedFilter()
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def filter(self, items, spec):
+        if items is not self.catalog:
+            return self.uncached_filter.filter(items, spec)
+        return iter(self.results(spec))
+
+    def count(self, items, spec):
+        if items is not self.catalog:
+            return self.uncached_filter.count(items, spec)
+        return len(self.results(spec))
+
+    def results(self, spec):
+        """
+        Returns:
+            A list of the catalog products that satisfy the specification.
+        """
+        cached = self.cache.get(spec)
+        if cached is not None and cached[0] == self.catalog.version:
+            self.hits += 1
+            self.cache.move_to_end(spec)
+            return cached[1]
+        self.misses += 1
+        results = list(self.uncached_filter.filter(self.catalog, spec))
+        self.cache[spec] = (self.catalog.version, results)
+        self.cache.move_to_end(spec)
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return results
+
+
+if __name__ == "__main__":
+
+    catalog = IndexedProductCatalog([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+    ])
+    house_id = catalog.add(Product('House', Color.BLUE, Size.LARGE))
+    caching_filter = CachingFilter(catalog)
+
+    for _ in range(3):
+        large_blue = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+        names = [p.name for p in caching_filter.filter(catalog, large_blue)]
+        print(f'Large blue items: {names}')
+    catalog.update(house_id, color=Color.RED)
+    names = [p.name for p in caching_filter.filter(catalog, large_blue)]
+    print(f'Large blue items after painting the house: {names}')
+    print(f'Hits: {caching_filter.hits}, misses: {caching_filter.misses}')
@@ -0,0 +1,167 @@
+from functools import singledispatch
+
+from ocp import (
+    AndSpecification,
+    AndSpecificationWorse,
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    NotSpecification,
+    OrSpecification,
+    Product,
+    Size,
+    SizeSpecification,
+    Specification,
+    conjuncts,
+    is_plain,
+)
+
+# Note. Specifications composed with `&` or `AndSpecificationWorse` are
+# nested and can repeat specifications. `normalize` returns an equivalent
+# specification that is simpler to check.
+
+
+class NothingSpecification(Specification):
+    """
+    Not satisfied by any item, for example, a product that must be red and
+    blue.
+    """
+    def is_satisfied(self, item):
+        return False
+
+    def expression(self, constants):
+        return "False"
+
+
+@singledispatch
+def required_value(spec):
+    """
+    Returns:
+        A (attribute, value) tuple if the specification requires the
+        attribute to have that value, else None. Two specifications that
+        require different values for the same attribute are a contradiction.
+
+    New specifications can be added with `@required_value.register`.
+    """
+    return None
+
+
+@required_value.register
+def _(spec: ColorSpecification):
+    return 'color', spec.color
+
+
+@required_value.register
+def _(spec: SizeSpecification):
+    return 'size', spec.size
+
+
+@required_value.register
+def _(spec: NameSpecification):
+    return 'name', spec.name.lower()
+
+
+def is_contradiction(specs):
+    if any(isinstance(spec, NothingSpecification) for spec in specs):
+        return True
+    required = {}
+    for spec in specs:
+        if NotSpecification(spec) in specs:
+            return True
+        value = required_value(spec)
+        if value is None:
+            continue
+        attribute, value = value
+        if required.setdefault(attribute, value) != value:
+            return True
+    return False
+
+
+def normalize(spec):
+    """
+    Returns an equivalent specification where:
+
+    - Nested `AndSpecification`s and `AndSpecificationWorse`s are a single
+      `AndSpecification`, the same for `OrSpecification`s.
+    - Repeated specifications are removed (they are compared by structure).
+    - Contradictions are a `NothingSpecification`.
+    """
+    if is_plain(spec, AndSpecification) or is_plain(spec, AndSpecificationWorse):
+        children = []
+        for conjunct in conjuncts(spec):
+            conjunct = normalize(conjunct)
+            if is_plain(conjunct, AndSpecification):
+                children.extend(conjunct.args)
+            else:
+                children.append(conjunct)
+        children = list(dict.fromkeys(children))
+        if is_contradiction(children):
+            return NothingSpecification()
+        if len(children) == 1:
+            return children[0]
+        return AndSpecification(*children)
+    if is_plain(spec, OrSpecification):
+        children = []
+        for child in map(normalize, spec.args):
+            if is_plain(child, OrSpecification):
+                children.extend(child.args)
+            elif not isinstance(child, NothingSpecification):
+                children.append(child)
+        children = list(dict.fromkeys(children))
+        if not children:
+            return NothingSpecification()
+        if len(children) == 1:
+            return children[0]
+        return OrSpecification(*children)
+    if is_plain(spec, NotSpecification):
+        child = normalize(spec.spec)
+        if is_plain(child, NotSpecification):
+            return child.spec
+        return NotSpecification(child)
+    return spec
+
+
+class NormalizingFilter(Filter):
+    """
+    Normalizes the specification before using another filter. If the
+    specification is a contradiction, the items are not iterated.
+    """
+    def __init__(self, filter=None):
+        self.normalized_filter = filter or BetterFilter()
+
+    def filter(self, items, spec):
+        spec = normalize(spec)
+        if isinstance(spec, NothingSpecification):
+            return iter(())
+        return self.normalized_filter.filter(items, spec)
+
+    def count(self, items, spec):
+        spec = normalize(spec)
+        if isinstance(spec, NothingSpecification):
+            return 0
+        return self.normalized_filter.count(items, spec)
+
+    def exists(self, items, spec):
+        spec = normalize(spec)
+        if isinstance(spec, NothingSpecification):
+            return False
+        return self.normalized_filter.exists(items, spec)
+
+
+if __name__ == "__main__":
+
+    large = SizeSpecification(Size.LARGE)
+    large_blue = large & ColorSpecification(Color.BLUE)
+    large_blue_worse = AndSpecificationWorse(large, ColorSpecification(Color.BLUE))
+    specs = [
+        large_blue & NameSpecification("house"),
+        AndSpecificationWorse(large_blue_worse, large & NameSpecification("house")),
+        large_blue & ColorSpecification(Color.RED),
+    ]
+    for spec in specs:
+        print(f'{spec!r}\n  -> {normalize(spec)!r}')
+
+    products = [Product('House', Color.BLUE, Size.LARGE)]
+    print(f'Red and blue products: {NormalizingFilter().count(products, specs[2])}')
@@ -0,0 +1,117 @@
+from collections import Counter
+from functools import singledispatch
+from itertools import product
+from operator import attrgetter
+
+from bitmap_index import BitmapIndex, bitmap
+from mapped_catalog import MappedCatalog
+from ocp import Color, Size, SizeSpecification
+from product_table import ProductTable, mask
+
+# Note. Facets are the number of products of each value of an attribute,
+# for example, how many of the blue products are small, medium or large.
+
+# Product attribute of each enum.
+ATTRIBUTES = {Color: 'color', Size: 'size'}
+
+
+def facets(items, spec, by=(Color, Size)):
+    """
+    Counts the items that satisfy the specification by the values of the
+    enums in `by`.
+
+    Returns:
+        A dict with a `Counter` for each enum and, if there is more than one
+        enum, the cross-tab: a `Counter` with a tuple of values as key for
+        the tuple of enums. Example:
+
+            >>> facets(products, large, by=(Color, Size))
+            {Color: Counter({Color.RED: 2, ...}),
+             Size: Counter({Size.LARGE: 6}),
+             (Color, Size): Counter({(Color.RED, Size.LARGE): 2, ...})}
+
+    """
+    by = tuple(by)
+    crosstab = count_by(items, spec, by)
+    result = {}
+    for position, enum in enumerate(by):
+        counts = Counter()
+        for values, count in crosstab.items():
+            counts[values[position]] += count
+        result[enum] = counts
+    if len(by) > 1:
+        result[by] = crosstab
+    return result
+
+
+@singledispatch
+def count_by(items, spec, by):
+    """
+    Returns:
+        A `Counter` with the tuples of values of the `by` enums of the items
+        that satisfy the specification.
+
+    The items are iterated once. The indexes and tables count without
+    iterating them; new ones can be added with `@count_by.register`.
+    """
+    values = attrgetter(*(ATTRIBUTES[enum] for enum in by))
+    matches = filter(spec.compile(), items)
+    if len(by) == 1:
+        return Counter((value,) for value in map(values, matches))
+    return Counter(map(values, matches))
+
+
+@count_by.register
+def _(items: BitmapIndex, spec, by):
+    matches = bitmap(spec, items)
+    result = Counter()
+    for values in product(*by):
+        selected = matches
+        for value in values:
+            selected &= getattr(items, f'{ATTRIBUTES[type(value)]}_bitmap')(value)
+        if selected:
+            result[values] = selected.bit_count()
+    return result
+
+
+@count_by.register(ProductTable)
+@count_by.register(MappedCatalog)
+def _(items, spec, by):
+    # The columns are joined in a single column where each byte has the
+    # values of the row, and the rows that don't match are set to 0.
+    # Counting each combination of values is a `bytes.count`.
+    shifts = []
+    joined = 0
+    shift = 0
+    for enum in by:
+        column = getattr(items, f'{ATTRIBUTES[enum]}s')
+        joined |= int.from_bytes(column, 'little') << shift
+        shifts.append(shift)
+        shift += max(member.value for member in enum).bit_length()
+    if shift > 8:
+        return count_by.dispatch(object)(items, spec, by)
+    matches = int.from_bytes(mask(spec, items), 'little') * 0xFF
+    joined = (joined & matches).to_bytes(len(items), 'little')
+    result = Counter()
+    for values in product(*by):
+        code = sum(value.value << shift for value, shift in zip(values, shifts))
+        count = joined.count(code)
+        if count:
+            result[values] = count
+    return result
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    products = create_products(100_000)
+    large = SizeSpecification(Size.LARGE)
+    for name, items in [
+        ('scan', products),
+        ('bitmap index', BitmapIndex(products)),
+        ('product table', ProductTable(products)),
+    ]:
+        result = facets(items, large, by=(Color, Size))
+        print(f'Large products by color ({name}): '
+              f'{ {color.name: count for color, count in result[Color].items()} }')
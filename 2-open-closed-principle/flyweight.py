@@ -0,0 +1,142 @@
+import random
+import sys
+import tracemalloc
+
+from ocp import Color, Product, Size
+from product_table import SlottedProduct
+
+# Note. Products with the same name, color and size are shared (flyweight
+# pattern), so they must not be modified: `SharedProduct` raises an error if
+# an attribute is set. To change a shared product in a catalog, remove it
+# and add the new one, `IndexedProductCatalog.update` doesn't work with them.
+
+
+class SharedProduct(SlottedProduct):
+    """
+    Immutable product created by a `ProductFactory`. It's slotted, without a
+    `__dict__`, so the attributes can only be set with `object.__setattr__`.
+
+    Two shared products of the same factory are equal only if they are the
+    same object, so they can be compared with `is`.
+    """
+    __slots__ = ()
+
+    def __init__(self, name, color, size):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'color', color)
+        object.__setattr__(self, 'size', size)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.name!r}, {self.color}, {self.size})'
+
+    # Pickling and copying would set the attributes with `__setattr__`. A
+    # pickled product is created again with `__init__` (it's not shared with
+    # the products of the other process) and a copy is the same product.
+
+    def __reduce__(self):
+        return SharedProduct, (self.name, self.color, self.size)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class ProductFactory:
+    """
+    Creates a single `SharedProduct` for each (name, color, size) and
+    interns the names with `sys.intern`.
+    """
+    def __init__(self):
+        self.products = {}
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.products)
+
+    def product(self, name, color, size):
+        key = (name, color, size)
+        product = self.products.get(key)
+        if product is None:
+            product = SharedProduct(sys.intern(name), color, size)
+            # The key keeps the interned name, not the one received.
+            self.products[(product.name, color, size)] = product
+            self.created += 1
+        else:
+            self.reused += 1
+        return product
+
+    def intern(self, products):
+        """
+        Yields:
+            The shared product of each product.
+        """
+        for p in products:
+            yield self.product(p.name, p.color, p.size)
+
+
+def feed_rows(count, distinct, seed=0):
+    """
+    Returns:
+        `count` rows of (name, color, size) with about `distinct` different
+        ones. Each name is a new string, as the ones read from a file.
+    """
+    rng = random.Random(seed)
+    colors = list(Color)
+    sizes = list(Size)
+    values = [
+        (f'Product {i}', rng.choice(colors), rng.choice(sizes))
+        for i in range(distinct)
+    ]
+    rows = []
+    for _ in range(count):
+        name, color, size = rng.choice(values)
+        rows.append((name.encode().decode(), color, size))
+    return rows
+
+
+def allocated_bytes(create, rows):
+    """
+    Returns:
+        The memory allocated by `create(rows)`, including the names.
+    """
+    tracemalloc.start()
+    result = create(rows)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def copy_names(rows):
+    # The rows of `feed_rows` are created before tracemalloc starts, so the
+    # names are copied to measure them too.
+    return [(name.encode().decode(), color, size) for name, color, size in rows]
+
+
+if __name__ == "__main__":
+
+    import pickle
+
+    count = 200_000
+    for distinct in [100, 10_000, 100_000]:
+        rows = feed_rows(count, distinct)
+        plain = allocated_bytes(
+            lambda rows: [Product(*row) for row in copy_names(rows)], rows)
+        factory = ProductFactory()
+        shared = allocated_bytes(
+            lambda rows: [factory.product(*row) for row in copy_names(rows)], rows)
+        print(f'{count} products, {len(factory)} distinct: '
+              f'{plain / count:.0f} bytes per product, '
+              f'{shared / count:.0f} shared ({1 - shared / plain:.0%} saved)')
+
+    house = ProductFactory().product('House', Color.BLUE, Size.LARGE)
+    print(f'Pickled and loaded: {pickle.loads(pickle.dumps(house))!r}')
@@ -0,0 +1,247 @@
+from collections import defaultdict
+from functools import singledispatch
+
+from ocp import (
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    OrSpecification,
+    Product,
+    Size,
+    SizeSpecification,
+    conjuncts,
+)
+
+# Note. The `Filter` and `Specification` classes of `ocp.py` are not modified,
+# we only add new classes that inherit from them (open-closed principle).
+
+
+class IndexedProductCatalog:
+    """
+    Stores products and keeps a hash index for each attribute we filter by.
+
+    Each index maps an attribute value to the set of ids of the products with
+    that value, so a lookup does not need to iterate all the products.
+
+    The indexes are only kept up to date when the products are modified with
+    the catalog methods (`add`, `remove` and `update`). Each modification
+    increments `version`, so other classes know when their data is outdated,
+    and calls the listeners added with `subscribe`.
+    """
+    def __init__(self, products=()):
+        self.products = {}
+        self.color_index = defaultdict(set)
+        self.size_index = defaultdict(set)
+        # Names are lower-cased, as `NameSpecification` compares them.
+        self.name_index = defaultdict(set)
+        self._next_id = 0
+        self.version = 0
+        # Incremented only when a name is added to or removed from the
+        # catalog, for the classes that only use the names.
+        self.names_version = 0
+        self.listeners = []
+        for product in products:
+            self.add(product)
+
+    def __iter__(self):
+        return iter(self.products.values())
+
+    def __len__(self):
+        return len(self.products)
+
+    def add(self, product):
+        """
+        Returns:
+            The id assigned to the product.
+        """
+        product_id = self._next_id
+        self._next_id += 1
+        self.products[product_id] = product
+        self._index(product_id, product)
+        self._changed(product_id)
+        return product_id
+
+    def remove(self, product_id):
+        product = self.products.pop(product_id)
+        self._unindex(product_id, product)
+        self._changed(product_id)
+        return product
+
+    def update(self, product_id, **changes):
+        """
+        Modifies the attributes of a product and its indexes.
+
+        Args:
+            product_id: id returned by `add`.
+            changes: new values, example: `color=Color.RED`.
+        """
+        product = self.products[product_id]
+        # The name index is only changed if the name changes (see
+        # `names_version`).
+        name = 'name' in changes
+        self._unindex(product_id, product, name)
+        for attribute, value in changes.items():
+            setattr(product, attribute, value)
+        self._index(product_id, product, name)
+        self._changed(product_id)
+        return product
+
+    def subscribe(self, listener):
+        """
+        Args:
+            listener: function called with the catalog and the id of the
+                product added, removed or updated.
+        """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def _changed(self, product_id):
+        self.version += 1
+        for listener in self.listeners:
+            listener(self, product_id)
+
+    def _index(self, product_id, product, name=True):
+        self.color_index[product.color].add(product_id)
+        self.size_index[product.size].add(product_id)
+        if name:
+            ids = self.name_index[product.name.lower()]
+            if not ids:
+                self.names_version += 1
+            ids.add(product_id)
+
+    def _unindex(self, product_id, product, name=True):
+        self.color_index[product.color].discard(product_id)
+        self.size_index[product.size].discard(product_id)
+        if name:
+            ids = self.name_index[product.name.lower()]
+            ids.discard(product_id)
+            if not ids:
+                self.names_version += 1
+
+
+@singledispatch
+def access_path(spec, catalog):
+    """
+    Returns:
+        The ids of the catalog products that satisfy the specification, or
+        None if the specification cannot be answered with an index.
+
+    New specifications can add their own access path with
+    `@access_path.register`.
+    """
+    return None
+
+
+@access_path.register
+def _(spec: ColorSpecification, catalog):
+    return catalog.color_index.get(spec.color, set())
+
+
+@access_path.register
+def _(spec: SizeSpecification, catalog):
+    return catalog.size_index.get(spec.size, set())
+
+
+@access_path.register
+def _(spec: NameSpecification, catalog):
+    return catalog.name_index.get(spec.name.lower(), set())
+
+
+@access_path.register
+def _(spec: OrSpecification, catalog):
+    ids = set()
+    for child in spec.args:
+        child_ids = access_path(child, catalog)
+        if child_ids is None:
+            return None
+        ids |= child_ids
+    return ids
+
+
+class IndexedFilter(Filter):
+    """
+    Answers the specifications with an `access_path` (color, size and name,
+    and the ones registered by other modules) using the catalog indexes.
+
+    Combined specifications are answered with the intersection of the indexed
+    results and the items are only checked for the specifications that cannot
+    be indexed. If no specification can be indexed, all the items are scanned.
+    """
+    def __init__(self):
+        self.scan_filter = BetterFilter()
+
+    def filter(self, items, spec):
+        """
+        Args:
+            items: an `IndexedProductCatalog`. Other iterables are scanned.
+            spec: specification. See `Specification` class.
+        """
+        if not isinstance(items, IndexedProductCatalog):
+            yield from self.scan_filter.filter(items, spec)
+            return
+        ids, residual = self._lookup(items, spec)
+        if ids is None:
+            yield from self.scan_filter.filter(items, spec)
+            return
+        for product_id in sorted(ids):
+            product = items.products[product_id]
+            if all(other.is_satisfied(product) for other in residual):
+                yield product
+
+    def count(self, items, spec):
+        if isinstance(items, IndexedProductCatalog):
+            ids, residual = self._lookup(items, spec)
+            if ids is not None and not residual:
+                return len(ids)
+        return super().count(items, spec)
+
+    def exists(self, items, spec):
+        if isinstance(items, IndexedProductCatalog):
+            ids, residual = self._lookup(items, spec)
+            if ids is not None and not residual:
+                return len(ids) > 0
+        return super().exists(items, spec)
+
+    def _lookup(self, catalog, spec):
+        """
+        Returns:
+            The ids of the candidate products (None if the specification
+            cannot be indexed) and the specifications the candidates must
+            still satisfy.
+        """
+        indexed = []
+        residual = []
+        for conjunct in conjuncts(spec):
+            ids = access_path(conjunct, catalog)
+            if ids is None:
+                residual.append(conjunct)
+            else:
+                indexed.append(ids)
+        if not indexed:
+            return None, [spec]
+        # Start with the smallest set so the intersection is cheaper.
+        indexed.sort(key=len)
+        ids = set(indexed[0])
+        for other in indexed[1:]:
+            ids.intersection_update(other)
+        return ids, residual
+
+
+if __name__ == "__main__":
+
+    catalog = IndexedProductCatalog([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+        Product('House', Color.BLUE, Size.LARGE),
+    ])
+    indexed_filter = IndexedFilter()
+
+    print('Large blue house items (indexed):')
+    large_blue_house = SizeSpecification(Size.LARGE) \
+        & ColorSpecification(Color.BLUE) & NameSpecification("house")
+    for p in indexed_filter.filter(catalog, large_blue_house):
+        print(f' - {p.name} is large and blue house')
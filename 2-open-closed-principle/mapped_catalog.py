@@ -0,0 +1,192 @@
+from itertools import compress
+import mmap
+import struct
+
+from ocp import Color, ColorSpecification, NameSpecification, Product, Size, SizeSpecification
+from product_table import COLORS, SIZES, TableFilter, and_masks, equal_mask
+
+# Note. File format to open a catalog without reading it:
+#
+# - Header: magic, version, number of products and position of the strings.
+# - Columns: the color values, the size values and the positions of the
+#   names in the strings, each one stored contiguously. The positions are
+#   4 columns, one per byte (little-endian), so each one is a byte column.
+# - Strings: each name once, with its length before it.
+#
+# The file is opened with `mmap`, so the processes that open the same file
+# share the pages of the operating system cache.
+
+MAGIC = b'PCAT'
+VERSION = 2
+HEADER = struct.Struct('<4sHQQ')
+NAME_LENGTH = struct.Struct('<H')
+OFFSET_BYTES = 4
+
+
+def write_catalog(path, products):
+    """
+    Writes the products to a file that can be opened with `MappedCatalog`.
+    """
+    colors = bytearray()
+    sizes = bytearray()
+    offset_columns = [bytearray() for _ in range(OFFSET_BYTES)]
+    strings = bytearray()
+    offsets = {}
+    for product in products:
+        offset = offsets.get(product.name)
+        if offset is None:
+            offset = offsets[product.name] = len(strings)
+            encoded = product.name.encode()
+            strings += NAME_LENGTH.pack(len(encoded)) + encoded
+        colors.append(product.color.value)
+        sizes.append(product.size.value)
+        for column, byte in zip(offset_columns, offset.to_bytes(OFFSET_BYTES, 'little')):
+            column.append(byte)
+    count = len(colors)
+    strings_start = HEADER.size + count * (2 + OFFSET_BYTES)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, count, strings_start))
+        file.write(colors)
+        file.write(sizes)
+        for column in offset_columns:
+            file.write(column)
+        file.write(strings)
+
+
+class MappedRow:
+    """
+    View of a `MappedCatalog` row with the attributes of a `Product`.
+    """
+    __slots__ = ('catalog', 'row')
+
+    def __init__(self, catalog, row):
+        self.catalog = catalog
+        self.row = row
+
+    @property
+    def name(self):
+        return self.catalog.name(self.row)
+
+    @property
+    def color(self):
+        return COLORS[self.catalog.colors[self.row]]
+
+    @property
+    def size(self):
+        return SIZES[self.catalog.sizes[self.row]]
+
+
+class MappedCatalog:
+    """
+    Catalog file opened with `mmap`. Only the header is read when it's
+    opened; the products are read when they are used.
+
+    It has the attributes of a `ProductTable` used by the masks (see
+    `product_table.mask`), so it can be filtered with `TableFilter`. The
+    columns are `memoryview`s of the file, they are not copied.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, self.count, strings_start = HEADER.unpack_from(self._view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a catalog file')
+        columns = []
+        start = HEADER.size
+        for _ in range(2 + OFFSET_BYTES):
+            columns.append(self._view[start:start + self.count])
+            start += self.count
+        self.colors, self.sizes, *self.name_offset_columns = columns
+        self.strings = self._view[strings_start:]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for row in range(self.count):
+            yield MappedRow(self, row)
+
+    def close(self):
+        # The views must be released before closing the mmap.
+        for view in (self.colors, self.sizes, *self.name_offset_columns, self.strings):
+            view.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _name_offset(self, row):
+        return int.from_bytes(
+            bytes(column[row] for column in self.name_offset_columns), 'little')
+
+    def name(self, row):
+        return self._string(self._name_offset(row))
+
+    def _string(self, offset):
+        length, = NAME_LENGTH.unpack_from(self.strings, offset)
+        start = offset + NAME_LENGTH.size
+        return str(self.strings[start:start + length], 'utf-8')
+
+    def _name_offsets(self, name):
+        """
+        Yields the positions of the strings equal to `name`, ignoring the case.
+        """
+        name = name.lower()
+        offset = 0
+        while offset < len(self.strings):
+            string = self._string(offset)
+            if string.lower() == name:
+                yield offset
+            offset += NAME_LENGTH.size + len(string.encode())
+
+    def name_mask(self, name):
+        """
+        Returns:
+            The mask of the rows with the name. The name position is compared
+            byte by byte, so each comparison is a vectorized byte mask.
+        """
+        result = 0
+        for offset in self._name_offsets(name):
+            offset_mask = bytes([1]) * self.count
+            for column, byte in zip(self.name_offset_columns,
+                                    offset.to_bytes(OFFSET_BYTES, 'little')):
+                offset_mask = and_masks(offset_mask, equal_mask(column, byte))
+            result |= int.from_bytes(offset_mask, 'little')
+        return result.to_bytes(self.count, 'little')
+
+    def rows_with_name(self, name):
+        return compress(range(self.count), self.name_mask(name))
+
+    def product(self, row):
+        return Product(
+            self.name(row),
+            COLORS[self.colors[row]],
+            SIZES[self.sizes[row]],
+        )
+
+
+if __name__ == "__main__":
+
+    import tempfile
+    import time
+
+    from benchmark import create_products
+
+    with tempfile.NamedTemporaryFile(suffix='.pcat') as file:
+        write_catalog(file.name, create_products(1_000_000))
+
+        start = time.perf_counter()
+        catalog = MappedCatalog(file.name)
+        print(f'Opened {len(catalog)} products in {time.perf_counter() - start:.6f} s')
+
+        spec = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE) \
+            & NameSpecification("house")
+        start = time.perf_counter()
+        count = TableFilter().count(catalog, spec)
+        print(f'Large blue houses: {count} in {time.perf_counter() - start:.3f} s')
+        catalog.close()
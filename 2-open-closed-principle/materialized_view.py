@@ -0,0 +1,79 @@
+from indexed_filter import IndexedProductCatalog
+from ocp import Color, ColorSpecification, Product, Size, SizeSpecification
+
+
+class MaterializedView:
+    """
+    Keeps the ids of the catalog products that satisfy a specification.
+
+    The catalog is filtered once; after that, only the product added,
+    removed or updated is checked. The subscribers receive the changes.
+    """
+    def __init__(self, catalog, spec):
+        self.catalog = catalog
+        self.spec = spec
+        self._is_satisfied = spec.compile()
+        self.ids = {
+            product_id for product_id, product in catalog.products.items()
+            if self._is_satisfied(product)
+        }
+        self.subscribers = []
+        catalog.subscribe(self._product_changed)
+
+    def __iter__(self):
+        """
+        Yields the products of the view, in the catalog order.
+        """
+        for product_id in sorted(self.ids):
+            yield self.catalog.products[product_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def subscribe(self, subscriber):
+        """
+        Args:
+            subscriber: function called with the set of ids added to the view
+                and the set of ids removed from it.
+        """
+        self.subscribers.append(subscriber)
+
+    def close(self):
+        """
+        Stops updating the view.
+        """
+        self.catalog.unsubscribe(self._product_changed)
+
+    def _product_changed(self, catalog, product_id):
+        product = catalog.products.get(product_id)
+        satisfied = product is not None and self._is_satisfied(product)
+        if satisfied == (product_id in self.ids):
+            return
+        if satisfied:
+            self.ids.add(product_id)
+            added, removed = {product_id}, set()
+        else:
+            self.ids.remove(product_id)
+            added, removed = set(), {product_id}
+        for subscriber in self.subscribers:
+            subscriber(added, removed)
+
+
+if __name__ == "__main__":
+
+    catalog = IndexedProductCatalog([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+    ])
+    large_blue = MaterializedView(
+        catalog, SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE))
+    large_blue.subscribe(
+        lambda added, removed: print(f' - added: {added}, removed: {removed}'))
+
+    print('Adding a house:')
+    house_id = catalog.add(Product('House', Color.BLUE, Size.LARGE))
+    print('Painting the tree blue:')
+    catalog.update(1, color=Color.BLUE)
+    print('Removing the house:')
+    catalog.remove(house_id)
+    print(f'Large blue items: {[p.name for p in large_blue]}')
@@ -0,0 +1,104 @@
+from canonical import normalize
+from ocp import (
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    Size,
+    SizeSpecification,
+    conjuncts,
+    constant,
+)
+
+
+def compile_router(specs):
+    """
+    Returns a function that receives an item and returns the list of names
+    of the specifications it satisfies.
+
+    Like `Specification.compile`, the code of all the specifications is
+    joined in a single function. Each conjunct used by more than one
+    specification has a variable, so it's checked at most once per item,
+    and only if needed.
+    """
+    constants = {}
+    variables = {}
+    lines = []
+    for name, spec in specs.items():
+        checks = []
+        for conjunct in conjuncts(normalize(spec)):
+            if conjunct not in variables:
+                variables[conjunct] = f'v{len(variables)}'
+            variable = variables[conjunct]
+            checks.append(
+                f'({variable} if {variable} is not None else '
+                f'({variable} := bool({conjunct.expression(constants)})))')
+        # Without conjuncts, for example `AndSpecification()`, all the items
+        # are satisfied.
+        lines.append(f'    if {" and ".join(checks) or "True"}:')
+        lines.append(f'        matched.append({constant(constants, name)})')
+    source = ['def route(item):', '    matched = []']
+    source.extend(f'    {variable} = None' for variable in variables.values())
+    source.extend(lines)
+    source.append('    return matched')
+    # The values are passed as variables, never written in the source code.
+    exec('\n'.join(source), constants)
+    return constants['route']
+
+
+class MultiFilter(Filter):
+    """
+    Checks lots of specifications iterating the items only once.
+    """
+    def filter(self, items, spec):
+        """
+        Args:
+            items: items we want to filter.
+            spec: dict with a name for each specification.
+
+        Yields:
+            (item, names) tuples, with the names of the specifications
+            satisfied by the item, for the items that satisfy any of them.
+        """
+        route = compile_router(spec)
+        for item in items:
+            names = route(item)
+            if names:
+                yield item, names
+
+    def results(self, items, specs):
+        """
+        Returns:
+            A dict with a list of the items that satisfy each specification.
+        """
+        results = {name: [] for name in specs}
+        for item, names in self.filter(items, specs):
+            for name in names:
+                results[name].append(item)
+        return results
+
+
+if __name__ == "__main__":
+
+    import time
+
+    from benchmark import create_products
+    from ocp import BetterFilter
+
+    products = create_products(100_000)
+    blue = ColorSpecification(Color.BLUE)
+    saved_searches = {
+        f'{name} {size.name}': blue & SizeSpecification(size) & NameSpecification(name)
+        for name in ['house', 'car', 'tree'] for size in Size
+    }
+
+    start = time.perf_counter()
+    for spec in saved_searches.values():
+        list(BetterFilter().filter(products, spec))
+    print(f'BetterFilter per search: {time.perf_counter() - start:.3f} s')
+
+    start = time.perf_counter()
+    results = MultiFilter().results(products, saved_searches)
+    print(f'MultiFilter: {time.perf_counter() - start:.3f} s')
+    for name, items in results.items():
+        print(f' - blue {name}: {len(items)} products')
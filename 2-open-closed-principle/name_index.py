@@ -0,0 +1,162 @@
+from bisect import bisect_left
+from collections import defaultdict
+from weakref import WeakKeyDictionary, ref
+
+from indexed_filter import IndexedProductCatalog, access_path
+from ocp import Color, Product, Size, Specification, constant
+from planner import PlannedFilter, QueryPlanner
+
+
+def edit_distance(word1, word2, max_distance):
+    """
+    Levenshtein distance between two words.
+
+    Returns:
+        The distance, or `max_distance + 1` if it's bigger than
+        `max_distance` (the calculation stops as soon as we know it).
+    """
+    if abs(len(word1) - len(word2)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(word2) + 1))
+    for i, char1 in enumerate(word1, 1):
+        current = [i]
+        for j, char2 in enumerate(word2, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char1 != char2),
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+class NamePrefixSpecification(Specification):
+    """
+    The name starts with the prefix, ignoring the case.
+    """
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def is_satisfied(self, item):
+        return item.name.lower().startswith(self.prefix.lower())
+
+    def expression(self, constants):
+        return f"item.name.lower().startswith({constant(constants, self.prefix.lower())})"
+
+
+class FuzzyNameSpecification(Specification):
+    """
+    The name is at most `max_distance` edits (insertions, deletions or
+    substitutions) away from `name`, ignoring the case.
+    """
+    def __init__(self, name, max_distance=1):
+        self.name = name
+        self.max_distance = max_distance
+
+    def is_satisfied(self, item):
+        return edit_distance(
+            item.name.lower(), self.name.lower(), self.max_distance
+        ) <= self.max_distance
+
+
+class NameIndex:
+    """
+    Exact, prefix and fuzzy lookups over the lower-cased names of a catalog.
+
+    The names are lower-cased once, when the products are added to the
+    catalog (see `IndexedProductCatalog.name_index`). This class keeps them
+    sorted, for the prefix lookups with `bisect`, and grouped by length, so
+    the fuzzy lookups only compare names of a similar length. Both are
+    rebuilt when a name is added to or removed from the catalog (see
+    `IndexedProductCatalog.names_version`).
+    """
+    _indexes = WeakKeyDictionary()
+
+    def __init__(self, catalog):
+        # A weak reference, else the index, a value of `_indexes`, would keep
+        # the catalog, its key, alive.
+        self._catalog = ref(catalog)
+        self._version = None
+        self._sorted_names = []
+        self._names_by_length = {}
+
+    @property
+    def catalog(self):
+        return self._catalog()
+
+    @classmethod
+    def of(cls, catalog):
+        """
+        Returns:
+            The name index of the catalog, created only once.
+        """
+        if catalog not in cls._indexes:
+            cls._indexes[catalog] = cls(catalog)
+        return cls._indexes[catalog]
+
+    def _update(self):
+        if self._version == self.catalog.names_version:
+            return
+        names = [name for name, ids in self.catalog.name_index.items() if ids]
+        self._sorted_names = sorted(names)
+        self._names_by_length = defaultdict(list)
+        for name in names:
+            self._names_by_length[len(name)].append(name)
+        self._version = self.catalog.names_version
+
+    def _ids(self, names):
+        ids = set()
+        for name in names:
+            ids |= self.catalog.name_index[name]
+        return ids
+
+    def exact(self, name):
+        return set(self.catalog.name_index.get(name.lower(), ()))
+
+    def prefix(self, prefix):
+        self._update()
+        prefix = prefix.lower()
+        names = []
+        for name in self._sorted_names[bisect_left(self._sorted_names, prefix):]:
+            if not name.startswith(prefix):
+                break
+            names.append(name)
+        return self._ids(names)
+
+    def fuzzy(self, name, max_distance):
+        self._update()
+        name = name.lower()
+        names = []
+        for length in range(len(name) - max_distance, len(name) + max_distance + 1):
+            for candidate in self._names_by_length.get(length, ()):
+                if edit_distance(candidate, name, max_distance) <= max_distance:
+                    names.append(candidate)
+        return self._ids(names)
+
+
+@access_path.register
+def _(spec: NamePrefixSpecification, catalog):
+    return NameIndex.of(catalog).prefix(spec.prefix)
+
+
+@access_path.register
+def _(spec: FuzzyNameSpecification, catalog):
+    return NameIndex.of(catalog).fuzzy(spec.name, spec.max_distance)
+
+
+if __name__ == "__main__":
+
+    catalog = IndexedProductCatalog([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+        Product('House', Color.BLUE, Size.LARGE),
+        Product('Houseboat', Color.RED, Size.LARGE),
+    ])
+    planned_filter = PlannedFilter()
+
+    for spec in [NamePrefixSpecification('HOUSE'), FuzzyNameSpecification('hose')]:
+        print(QueryPlanner().explain(catalog, spec))
+        for p in planned_filter.filter(catalog, spec):
+            print(f' - {p.name}')
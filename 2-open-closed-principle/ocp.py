@@ -1,4 +1,5 @@
 from enum import Enum
+from itertools import islice
 
 # Note. This example uses the `Specification` enterprise pattern.
 
@@ -56,9 +57,87 @@ class Specification:
 
     This class will be used for inheritance and be expanded.
     """
+    def __init_subclass__(cls, **kwargs):
+        """
+        A subclass that overrides `is_satisfied`, but not `expression`, is
+        compiled as a call to its `is_satisfied`; the inherited code would
+        check the items as its parent class.
+        """
+        super().__init_subclass__(**kwargs)
+        if not issubclass(defining_class(cls, 'expression'),
+                          defining_class(cls, 'is_satisfied')):
+            cls.expression = Specification.expression
+
     def is_satisfied(self, item):
         pass
 
+    def __eq__(self, other):
+        """
+        Specifications are equal if they are of the same class and have the
+        same attributes, so `ColorSpecification(Color.BLUE)` created twice
+        is the same specification.
+
+        If an attribute can't be hashed (for example, a list), only the
+        specification is equal to itself.
+        """
+        if not isinstance(other, Specification):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        key = (type(self), tuple(sorted(vars(self).items())))
+        try:
+            hash(key)
+        except TypeError:
+            return id(self)
+        return key
+
+    def __repr__(self):
+        attributes = ', '.join(
+            f'{name}={value!r}' for name, value in vars(self).items())
+        return f'{type(self).__name__}({attributes})'
+
+    def compile(self):
+        """
+        Returns a function equivalent to `is_satisfied` but faster.
+
+        The whole specification tree is turned into a single Python expression,
+        for example:
+
+            >>> (large & ColorSpecification(Color.BLUE)).compile()
+
+        works like:
+
+            >>> lambda item: (item.size == Size.LARGE and item.color == Color.BLUE)
+
+        so we avoid a method call per specification and item.
+        """
+        constants = {}
+        try:
+            expression = self.expression(constants)
+            # The values are passed as variables, never written in the source
+            # code.
+            return eval(f"lambda item: {expression}", constants)
+        except (SyntaxError, RecursionError):
+            # Too deep for the Python compiler (for example, hundreds of
+            # nested `|`), the specification is checked as it is.
+            return self.is_satisfied
+
+    def expression(self, constants):
+        """
+        Python code that checks the `item`, used by `compile`.
+
+        Subclasses can return their own code to be inlined; by default,
+        `is_satisfied` is called.
+
+        Args:
+            constants: dict where the values used by the code are stored.
+        """
+        return f"{constant(constants, self.is_satisfied)}(item)"
+
     def __and__(self, other):
         """
         __and__ operator makes life easier than use AndSpecificationWorse.
@@ -74,6 +153,86 @@ class Specification:
         """
         return AndSpecification(self, other)
 
+    def __or__(self, other):
+        """
+        Same as `__and__` but using `|`:
+
+            >>> green_or_blue = green | ColorSpecification(Color.BLUE)
+
+        """
+        return OrSpecification(self, other)
+
+    def __invert__(self):
+        """
+        Using `~`:
+
+            >>> not_green = ~green
+
+        """
+        return NotSpecification(self)
+
+
+def constant(constants, value):
+    """
+    Stores a value used by a compiled specification.
+
+    Returns:
+        The variable name to use in the code.
+    """
+    name = f"_{len(constants)}"
+    constants[name] = value
+    return name
+
+
+def defining_class(cls, attribute):
+    """
+    Returns:
+        The class of the MRO of `cls` where the attribute is defined.
+    """
+    return next(c for c in cls.__mro__ if attribute in vars(c))
+
+
+def is_plain(spec, cls):
+    """
+    Returns:
+        True if the specification is a `cls` that checks the items with the
+        `is_satisfied` of `cls`, so it can be replaced by its parts (for
+        example, the conjuncts of an `AndSpecification`). A subclass that
+        overrides `is_satisfied` is another specification, unless it sets
+        `checks_like = cls`.
+    """
+    return isinstance(spec, cls) and (
+        type(spec).is_satisfied is cls.is_satisfied
+        or getattr(type(spec), 'checks_like', None) is cls)
+
+
+def conjuncts(spec):
+    """
+    Returns:
+        The specifications that must all be satisfied, with the nested
+        `AndSpecification`s and `AndSpecificationWorse`s flattened.
+
+    The tree is walked without recursion, so long chains of `&` work.
+    """
+    result = []
+    pending = [spec]
+    while pending:
+        spec = pending.pop()
+        if is_plain(spec, AndSpecification):
+            pending.extend(reversed(spec.args))
+        elif is_plain(spec, AndSpecificationWorse):
+            pending += [spec.spec2, spec.spec1]
+        else:
+            result.append(spec)
+    return result
+
+
+def and_expression(spec, constants):
+    specs = conjuncts(spec)
+    if not specs:
+        return "True"
+    return "(" + " and ".join(s.expression(constants) for s in specs) + ")"
+
 
 class Filter:
     """
@@ -91,6 +250,23 @@ class Filter:
         """
         pass
 
+    # The next methods stop iterating as soon as they have the answer.
+    # Subclasses that can answer them without checking the items (for
+    # example, with indexes) can override them.
+
+    def first(self, items, spec, n):
+        """
+        Returns:
+            A list with the first `n` items that satisfy the criteria.
+        """
+        return list(islice(self.filter(items, spec), n))
+
+    def count(self, items, spec):
+        return sum(1 for _ in self.filter(items, spec))
+
+    def exists(self, items, spec):
+        return any(True for _ in self.filter(items, spec))
+
 
 class ColorSpecification(Specification):
     def __init__(self, color):
@@ -99,6 +275,9 @@ class ColorSpecification(Specification):
     def is_satisfied(self, item):
         return item.color == self.color
 
+    def expression(self, constants):
+        return f"item.color == {constant(constants, self.color)}"
+
 
 class SizeSpecification(Specification):
     def __init__(self, size):
@@ -107,6 +286,9 @@ class SizeSpecification(Specification):
     def is_satisfied(self, item):
         return item.size == self.size
 
+    def expression(self, constants):
+        return f"item.size == {constant(constants, self.size)}"
+
 
 class NameSpecification(Specification):
     def __init__(self, name):
@@ -115,6 +297,10 @@ class NameSpecification(Specification):
     def is_satisfied(self, item):
         return item.name.lower() == self.name.lower()
 
+    def expression(self, constants):
+        # The specification name is lower-cased once, not per item.
+        return f"item.name.lower() == {constant(constants, self.name.lower())}"
+
 
 class AndSpecificationWorse(Specification):
     """
@@ -144,6 +330,9 @@ class AndSpecificationWorse(Specification):
         return self.spec1.is_satisfied(item) and \
                self.spec2.is_satisfied(item)
 
+    def expression(self, constants):
+        return and_expression(self, constants)
+
 
 class AndSpecification(Specification):
     """
@@ -163,6 +352,48 @@ class AndSpecification(Specification):
         return all(map(
             lambda spec: spec.is_satisfied(item), self.args))
 
+    def expression(self, constants):
+        """
+        Nested `AndSpecification`s are flattened into a single `and` chain
+        that stops at the first specification not satisfied.
+        """
+        return and_expression(self, constants)
+
+
+class OrSpecification(Specification):
+    """
+    Combinator that is satisfied if any of the specifications is satisfied.
+    """
+    def __init__(self, *args):
+        """
+        Args:
+            args: the specifications.
+        """
+        self.args = args
+
+    def is_satisfied(self, item):
+        return any(spec.is_satisfied(item) for spec in self.args)
+
+    def expression(self, constants):
+        if not self.args:
+            return "False"
+        return "(" + " or ".join(
+            spec.expression(constants) for spec in self.args) + ")"
+
+
+class NotSpecification(Specification):
+    """
+    Combinator that is satisfied if the specification is not satisfied.
+    """
+    def __init__(self, spec):
+        self.spec = spec
+
+    def is_satisfied(self, item):
+        return not self.spec.is_satisfied(item)
+
+    def expression(self, constants):
+        return f"(not {self.spec.expression(constants)})"
+
 
 class BetterFilter(Filter):
     """
@@ -172,11 +403,12 @@ class BetterFilter(Filter):
     If we need another type of filter, instead of modify this class,
     we can create another class that inherits from `Filter` and expands the filter
     funcionality.
+
+    The specification is compiled (see `Specification.compile`) before
+    iterating the items.
     """
     def filter(self, items, spec):
-        for item in items:
-            if spec.is_satisfied(item):
-                yield item
+        yield from filter(spec.compile(), items)
 
 
 if __name__ == "__main__":
@@ -224,3 +456,10 @@ if __name__ == "__main__":
     large_blue_house_worse = AndSpecificationWorse(large_blue_worse, NameSpecification("house"))
     show_filter(products, large_blue_house_worse, "is large and blue house (using worse Specification)")
 
+    print('Small or blue items:')
+    small_or_blue = SizeSpecification(Size.SMALL) | ColorSpecification(Color.BLUE)
+    show_filter(products, small_or_blue, "is small or blue")
+
+    print('Not green items:')
+    show_filter(products, ~green, "is not green")
+
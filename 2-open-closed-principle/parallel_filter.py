@@ -0,0 +1,166 @@
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+import multiprocessing
+import os
+import time
+
+from ocp import (
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    Size,
+    SizeSpecification,
+)
+from spec_codec import PlanCache, encode
+
+# Compiled specifications of each worker process. The specifications come
+# from the process that started the workers, so pickles are allowed.
+predicates = PlanCache(allow_pickle=True)
+
+# Items of the worker processes, set by `share_items` when they start.
+shared_items = None
+
+
+def share_items(items):
+    global shared_items
+    shared_items = items
+
+
+def satisfied_positions(encoded_spec, chunk):
+    """
+    Runs in the worker processes. The specification is received encoded
+    (see `spec_codec.py`) and compiled once per worker.
+
+    Args:
+        chunk: a list of items, or a `range` of rows of `shared_items`.
+
+    Returns:
+        The positions of the chunk items that satisfy the specification, so
+        only integers are sent back to the main process.
+    """
+    is_satisfied = predicates.predicate(encoded_spec)
+    if isinstance(chunk, range):
+        chunk = map(shared_items.__getitem__, chunk)
+    return [position for position, item in enumerate(chunk) if is_satisfied(item)]
+
+
+def pool_context():
+    """
+    Returns:
+        The `fork` context if the platform has it: the workers inherit the
+        memory of the main process, so the shared items are not pickled.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+class ParallelFilter(Filter):
+    """
+    Splits the items in chunks and checks them in a pool of processes.
+
+    A sequence (for example, a list) is given to the workers when they start
+    and only the ranges of rows of each chunk are sent to them. With `fork`,
+    the workers inherit it without pickling it. The items of other iterables
+    are sent in the chunks, so they must be picklable, and it's only worth it
+    when checking the specification is more expensive than pickling an item.
+
+    The results are yielded as the chunks are finished, without waiting for
+    all the items.
+    """
+    def __init__(self, workers=None, chunk_size=10_000, ordered=True):
+        """
+        Args:
+            workers: number of processes. By default, one per CPU.
+            chunk_size: items sent to a worker at once.
+            ordered: if False, the chunks are yielded as they finish instead
+                of in the order of the items.
+        """
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.ordered = ordered
+
+    def filter(self, items, spec):
+        spec = encode(spec, allow_pickle=True)
+        if isinstance(items, Sequence):
+            executor = ProcessPoolExecutor(
+                self.workers, mp_context=pool_context(),
+                initializer=share_items, initargs=(items,))
+            rows = range(len(items))
+            chunks = (
+                rows[start:start + self.chunk_size]
+                for start in range(0, len(items), self.chunk_size))
+            get = items.__getitem__
+        else:
+            executor = ProcessPoolExecutor(self.workers)
+            items = iter(items)
+            chunks = iter(lambda: list(islice(items, self.chunk_size)), [])
+            get = None
+        # Limits the chunks in memory when the results are consumed slowly.
+        max_pending = self.workers * 2
+        try:
+            if self.ordered:
+                results = self._filter_ordered(executor, chunks, spec, max_pending)
+            else:
+                results = self._filter_unordered(executor, chunks, spec, max_pending)
+            for item in results:
+                # With rows, the results are the rows of the items.
+                yield item if get is None else get(item)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _submit(executor, spec, chunk):
+        return executor.submit(satisfied_positions, spec, chunk), chunk
+
+    def _filter_ordered(self, executor, chunks, spec, max_pending):
+        pending = deque(
+            self._submit(executor, spec, chunk)
+            for chunk in islice(chunks, max_pending))
+        while pending:
+            future, chunk = pending.popleft()
+            for next_chunk in islice(chunks, 1):
+                pending.append(self._submit(executor, spec, next_chunk))
+            for position in future.result():
+                yield chunk[position]
+
+    def _filter_unordered(self, executor, chunks, spec, max_pending):
+        pending = dict(
+            self._submit(executor, spec, chunk)
+            for chunk in islice(chunks, max_pending))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                for position in future.result():
+                    yield chunk[position]
+            for next_chunk in islice(chunks, len(done)):
+                future, _ = self._submit(executor, spec, next_chunk)
+                pending[future] = next_chunk
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    products = create_products(1_000_000)
+    spec = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE) \
+        & NameSpecification("house")
+
+    start = time.perf_counter()
+    count = BetterFilter().count(products, spec)
+    print(f'BetterFilter: {count} products in {time.perf_counter() - start:.3f} s')
+
+    workers = 1
+    while workers <= os.cpu_count():
+        for name, items in [('list', products), ('iterator', iter(products))]:
+            parallel_filter = ParallelFilter(workers, chunk_size=50_000)
+            start = time.perf_counter()
+            count = sum(1 for _ in parallel_filter.filter(items, spec))
+            print(f'{workers:3} workers ({name}): {count} products '
+                  f'in {time.perf_counter() - start:.3f} s')
+        workers *= 2
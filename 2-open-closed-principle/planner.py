@@ -0,0 +1,199 @@
+from indexed_filter import IndexedProductCatalog, access_path
+from ocp import (
+    AndSpecification,
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    Product,
+    Size,
+    SizeSpecification,
+    conjuncts,
+)
+
+# Note. A query planner decides how to run a specification against an
+# `IndexedProductCatalog`: scanning all the products or reading the ids of
+# the candidates from the indexes (see `indexed_filter.access_path`) and
+# checking the rest of the specification.
+
+
+class FullScan:
+    """
+    Checks all the products of the catalog.
+    """
+    def __init__(self, spec, rows):
+        self.spec = spec
+        self.rows = rows
+        self.cost = rows * QueryPlanner.SCAN_COST
+
+    def execute(self, catalog):
+        return BetterFilter().filter(catalog, self.spec)
+
+    def matching_ids(self, catalog):
+        """
+        Yields:
+            The ids of the products that satisfy the specification.
+        """
+        is_satisfied = self.spec.compile()
+        for product_id, product in catalog.products.items():
+            if is_satisfied(product):
+                yield product_id
+
+    def count(self, catalog):
+        return BetterFilter().count(catalog, self.spec)
+
+    def explain(self):
+        return f'FullScan rows={self.rows} cost={self.cost:.0f}\n' \
+               f'  filter {self.spec!r}'
+
+
+class IndexScan:
+    """
+    Reads the candidates from the intersection of index lookups and checks
+    the residual specifications.
+
+    With one lookup, it's an index probe followed by residual filtering.
+    """
+    def __init__(self, lookups, residual, rows, cost):
+        """
+        Args:
+            lookups: list of (specification, ids) tuples.
+            residual: the specifications that are not answered by the lookups.
+            rows: estimated number of candidates.
+            cost: estimated cost.
+        """
+        self.lookups = lookups
+        self.residual = residual
+        self.rows = rows
+        self.cost = cost
+
+    def ids(self):
+        ids = set(self.lookups[0][1])
+        for _, other in self.lookups[1:]:
+            ids.intersection_update(other)
+        return ids
+
+    def execute(self, catalog):
+        for product_id in self.matching_ids(catalog):
+            yield catalog.products[product_id]
+
+    def matching_ids(self, catalog):
+        """
+        Yields:
+            The ids of the candidates that satisfy the residual
+            specifications, in ascending order.
+        """
+        is_satisfied = AndSpecification(*self.residual).compile()
+        for product_id in sorted(self.ids()):
+            if is_satisfied(catalog.products[product_id]):
+                yield product_id
+
+    def count(self, catalog):
+        if not self.residual:
+            # The products are not needed.
+            return len(self.ids())
+        return sum(1 for _ in self.execute(catalog))
+
+    def explain(self):
+        lines = [f'IndexScan rows={self.rows:.0f} cost={self.cost:.0f}']
+        for spec, ids in self.lookups:
+            lines.append(f'  lookup {spec!r} rows={len(ids)}')
+        for spec in self.residual:
+            lines.append(f'  filter {spec!r}')
+        return '\n'.join(lines)
+
+
+class QueryPlanner:
+    """
+    Chooses the cheapest plan for a specification with the sizes of the
+    index lookups of its conjuncts.
+
+    The costs are relative to checking one product while scanning.
+    """
+    SCAN_COST = 1
+    # Sorting the candidate ids and getting their products.
+    FETCH_COST = 2
+    # Checking if an id is in a set when intersecting.
+    INTERSECT_COST = 0.5
+
+    def plan(self, catalog, spec):
+        total = len(catalog)
+        lookups = []
+        residual = []
+        for conjunct in conjuncts(spec):
+            ids = access_path(conjunct, catalog)
+            if ids is None:
+                residual.append(conjunct)
+            else:
+                lookups.append((conjunct, ids))
+        full_scan = FullScan(spec, total)
+        if not lookups or total == 0:
+            return full_scan
+        # Start with the most selective lookup and intersect the next ones
+        # while they make the plan cheaper.
+        lookups.sort(key=lambda lookup: len(lookup[1]))
+        chosen = lookups[:1]
+        rows = len(lookups[0][1])
+        cost = rows * self.FETCH_COST
+        for lookup in lookups[1:]:
+            new_rows = rows * len(lookup[1]) / total
+            new_cost = cost + min(rows, len(lookup[1])) * self.INTERSECT_COST \
+                - (rows - new_rows) * self.FETCH_COST
+            if new_cost < cost:
+                chosen.append(lookup)
+                rows, cost = new_rows, new_cost
+            else:
+                residual.append(lookup[0])
+        if cost >= full_scan.cost:
+            return full_scan
+        return IndexScan(chosen, residual, rows, cost)
+
+    def explain(self, catalog, spec):
+        return self.plan(catalog, spec).explain()
+
+
+class PlannedFilter(Filter):
+    """
+    Filters an `IndexedProductCatalog` with the plan chosen by a
+    `QueryPlanner`. Other iterables are scanned.
+    """
+    def __init__(self, planner=None):
+        self.planner = planner or QueryPlanner()
+
+    def filter(self, items, spec):
+        if not isinstance(items, IndexedProductCatalog):
+            return BetterFilter().filter(items, spec)
+        return self.planner.plan(items, spec).execute(items)
+
+    def count(self, items, spec):
+        if not isinstance(items, IndexedProductCatalog):
+            return BetterFilter().count(items, spec)
+        return self.planner.plan(items, spec).count(items)
+
+    def exists(self, items, spec):
+        plan = None
+        if isinstance(items, IndexedProductCatalog):
+            plan = self.planner.plan(items, spec)
+        if isinstance(plan, IndexScan) and not plan.residual:
+            return len(plan.ids()) > 0
+        return super().exists(items, spec)
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    catalog = IndexedProductCatalog(create_products(100_000))
+    catalog.add(Product('Lamp', Color.RED, Size.SMALL))
+    planner = QueryPlanner()
+
+    for spec in [
+        SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+            & NameSpecification("house"),
+        ~ColorSpecification(Color.RED) & NameSpecification("lamp"),
+        ~ColorSpecification(Color.RED),
+    ]:
+        print(planner.explain(catalog, spec))
+        count = sum(1 for _ in PlannedFilter(planner).filter(catalog, spec))
+        print(f'{count} products\n')
@@ -0,0 +1,118 @@
+import csv
+from itertools import islice
+import json
+import time
+
+from ocp import BetterFilter, Color, ColorSpecification, Product, Size
+
+# Note. Reads products from files without loading all of them in memory, the
+# `Filter` classes receive a generator of products.
+
+# Text of the file to enum member, created once instead of per row.
+COLORS = {color.name.lower(): color for color in Color}
+SIZES = {size.name.lower(): size for size in Size}
+
+
+class ProductSource:
+    """
+    Base class.
+
+    Iterating it yields the products of a file, read in batches of
+    `batch_size` rows. Subclasses parse the rows of each format.
+    """
+    def __init__(self, path, batch_size=10_000, buffer_size=1024 * 1024):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer_size = buffer_size
+        self.rows = 0
+        self.seconds = 0.0
+
+    def __iter__(self):
+        with open(self.path, newline='', buffering=self.buffer_size) as file:
+            rows = self.parse(file)
+            while True:
+                start = time.perf_counter()
+                values = list(islice(rows, self.batch_size))
+                try:
+                    batch = [
+                        Product(name, COLORS[color.lower()], SIZES[size.lower()])
+                        for name, color, size in values
+                    ]
+                except KeyError:
+                    self._raise_unknown_value(values)
+                self.seconds += time.perf_counter() - start
+                if not batch:
+                    return
+                self.rows += len(batch)
+                yield from batch
+
+    def parse(self, file):
+        """
+        Yields:
+            (name, color, size) tuples of strings.
+        """
+        pass
+
+    def _raise_unknown_value(self, values):
+        """
+        Raises a `ValueError` for the first row of the batch with a color or
+        size that doesn't exist. The rows are counted from 1, without the
+        header and the blank lines.
+        """
+        for number, (name, color, size) in enumerate(values, self.rows + 1):
+            if color.lower() not in COLORS:
+                raise ValueError(f'{self.path}: row {number}: unknown color {color!r}')
+            if size.lower() not in SIZES:
+                raise ValueError(f'{self.path}: row {number}: unknown size {size!r}')
+
+    @property
+    def rows_per_second(self):
+        """
+        Throughput of reading and parsing, the time spent by the consumer of
+        the products is not counted.
+        """
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class CsvProductSource(ProductSource):
+    """
+    File with a header row with the columns `name`, `color` and `size`.
+    """
+    def parse(self, file):
+        reader = csv.reader(file)
+        columns = next(reader)
+        positions = [columns.index(column) for column in ('name', 'color', 'size')]
+        for row in reader:
+            if row:
+                yield tuple(row[position] for position in positions)
+
+
+class JsonlProductSource(ProductSource):
+    """
+    File with an object per line with the keys `name`, `color` and `size`.
+    """
+    def parse(self, file):
+        for line in file:
+            if line.strip():
+                row = json.loads(line)
+                yield row['name'], row['color'], row['size']
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    from benchmark import create_products
+
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['name', 'color', 'size'])
+        for p in create_products(500_000):
+            writer.writerow([p.name, p.color.name, p.size.name])
+        file.flush()
+
+        source = CsvProductSource(file.name)
+        count = sum(1 for _ in BetterFilter().filter(
+            source, ColorSpecification(Color.BLUE)))
+        print(f'Blue products: {count}')
+        print(f'Read {source.rows} rows, {source.rows_per_second:,.0f} rows/s')
@@ -0,0 +1,286 @@
+from array import array
+from collections import defaultdict
+from functools import singledispatch
+from itertools import compress
+import time
+import tracemalloc
+
+from ocp import (
+    AndSpecification,
+    AndSpecificationWorse,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    NotSpecification,
+    OrSpecification,
+    Product,
+    Size,
+    SizeSpecification,
+)
+
+# Note. Columnar storage to filter lots of products at once.
+#
+# A mask is a `bytes` object with one byte per row: 1 if the row satisfies the
+# specification and 0 if not. The masks are created and combined by C code
+# (`bytes.translate` and `int` bitwise operations), not by a Python loop per
+# product, so we get vectorized operations without extra dependencies.
+
+COLORS = {color.value: color for color in Color}
+SIZES = {size.value: size for size in Size}
+
+
+class SlottedProduct:
+    """
+    Same attributes as `Product` without a `__dict__` per instance.
+    """
+    __slots__ = ('name', 'color', 'size')
+
+    def __init__(self, name, color, size):
+        self.name = name
+        self.color = color
+        self.size = size
+
+
+class ProductRow:
+    """
+    Lightweight view of a `ProductTable` row with the attributes of a
+    `Product`, so it can be used with `Specification.is_satisfied`.
+    """
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def name(self):
+        return self.table.names[self.table.name_codes[self.row]]
+
+    @property
+    def color(self):
+        return COLORS[self.table.colors[self.row]]
+
+    @property
+    def size(self):
+        return SIZES[self.table.sizes[self.row]]
+
+
+class ProductTable:
+    """
+    Stores the products column-wise.
+
+    The colors and sizes are stored as their enum values, one byte per
+    product, and the names as codes of a list of interned strings.
+
+    Iterating the table yields a `ProductRow` per row instead of creating
+    the products.
+    """
+    def __init__(self, products=()):
+        self.colors = bytearray()
+        self.sizes = bytearray()
+        self.name_codes = array('I')
+        self.names = []
+        self._name_to_code = {}
+        # Rows of each lower-cased name, as `NameSpecification` compares them.
+        self._rows_by_name = defaultdict(lambda: array('I'))
+        self.extend(products)
+
+    def __len__(self):
+        return len(self.colors)
+
+    def __getitem__(self, row):
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return ProductRow(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ProductRow(self, row)
+
+    def append(self, product):
+        row = len(self)
+        self.colors.append(product.color.value)
+        self.sizes.append(product.size.value)
+        code = self._name_to_code.get(product.name)
+        if code is None:
+            code = self._name_to_code[product.name] = len(self.names)
+            self.names.append(product.name)
+        self.name_codes.append(code)
+        self._rows_by_name[product.name.lower()].append(row)
+
+    def extend(self, products):
+        for product in products:
+            self.append(product)
+
+    def product(self, row):
+        """
+        Returns:
+            A new `Product` with the values of the row.
+        """
+        return Product(
+            self.names[self.name_codes[row]],
+            COLORS[self.colors[row]],
+            SIZES[self.sizes[row]],
+        )
+
+    def rows_with_name(self, name):
+        return self._rows_by_name.get(name.lower(), ())
+
+
+def equal_mask(column, value):
+    """
+    Returns:
+        The mask of the rows of a byte column equal to `value`.
+    """
+    table = bytearray(256)
+    table[value] = 1
+    if isinstance(column, memoryview):
+        # A memoryview (for example, a column of a file) has no `translate`,
+        # a temporary copy is used.
+        column = column.tobytes()
+    return column.translate(table)
+
+
+def rows_mask(rows, length):
+    mask = bytearray(length)
+    for row in rows:
+        mask[row] = 1
+    return bytes(mask)
+
+
+def and_masks(mask1, mask2):
+    value = int.from_bytes(mask1, 'little') & int.from_bytes(mask2, 'little')
+    return value.to_bytes(len(mask1), 'little')
+
+
+def or_masks(mask1, mask2):
+    value = int.from_bytes(mask1, 'little') | int.from_bytes(mask2, 'little')
+    return value.to_bytes(len(mask1), 'little')
+
+
+def not_mask(mask):
+    return equal_mask(mask, 0)
+
+
+@singledispatch
+def mask(spec, table):
+    """
+    Returns:
+        The mask of the table rows that satisfy the specification.
+
+    New specifications can be vectorized with `@mask.register`; the ones not
+    registered are checked row by row.
+    """
+    return bytes(map(spec.compile(), table))
+
+
+@mask.register
+def _(spec: ColorSpecification, table):
+    return equal_mask(table.colors, spec.color.value)
+
+
+@mask.register
+def _(spec: SizeSpecification, table):
+    return equal_mask(table.sizes, spec.size.value)
+
+
+@mask.register
+def _(spec: NameSpecification, table):
+    return rows_mask(table.rows_with_name(spec.name), len(table))
+
+
+@mask.register
+def _(spec: AndSpecification, table):
+    result = bytes([1]) * len(table)
+    for child in spec.args:
+        result = and_masks(result, mask(child, table))
+    return result
+
+
+@mask.register
+def _(spec: AndSpecificationWorse, table):
+    return and_masks(mask(spec.spec1, table), mask(spec.spec2, table))
+
+
+@mask.register
+def _(spec: OrSpecification, table):
+    result = bytes(len(table))
+    for child in spec.args:
+        result = or_masks(result, mask(child, table))
+    return result
+
+
+@mask.register
+def _(spec: NotSpecification, table):
+    # And with `AndSpecification`, it's an AND NOT of the masks.
+    return not_mask(mask(spec.spec, table))
+
+
+class TableFilter(Filter):
+    """
+    Filters a `ProductTable` with the masks of the specifications.
+    """
+    def filter(self, items, spec):
+        """
+        Args:
+            items: a `ProductTable`.
+            spec: specification. See `Specification` class.
+        """
+        for row in self.rows(items, spec):
+            yield items.product(row)
+
+    def rows(self, table, spec):
+        return compress(range(len(table)), mask(spec, table))
+
+    def count(self, items, spec):
+        return mask(spec, items).count(1)
+
+    def exists(self, items, spec):
+        return 1 in mask(spec, items)
+
+
+def bytes_per_product(create, count=100_000):
+    """
+    Returns:
+        The memory allocated by `create(products)` divided by the number of
+        products. The names are shared, only the storage is measured.
+    """
+    from benchmark import create_products
+
+    values = [(p.name, p.color, p.size) for p in create_products(count)]
+    tracemalloc.start()
+    result = create(values)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return allocated / count
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+    from ocp import BetterFilter
+
+    products = create_products(1_000_000)
+    table = ProductTable(products)
+    large_blue_house = SizeSpecification(Size.LARGE) \
+        & ColorSpecification(Color.BLUE) & NameSpecification("house")
+
+    start = time.perf_counter()
+    count = sum(1 for _ in BetterFilter().filter(products, large_blue_house))
+    print(f'BetterFilter: {count} products in {time.perf_counter() - start:.3f} s')
+
+    start = time.perf_counter()
+    count = mask(large_blue_house, table).count(1)
+    print(f'ProductTable mask: {count} products in {time.perf_counter() - start:.3f} s')
+
+    print('Memory per product:')
+    storages = {
+        'Product': lambda values: [Product(*v) for v in values],
+        'SlottedProduct': lambda values: [SlottedProduct(*v) for v in values],
+        'ProductTable': lambda values: ProductTable(
+            SlottedProduct(*v) for v in values),
+    }
+    for name, create in storages.items():
+        print(f' - {name}: {bytes_per_product(create):.1f} bytes')
@@ -0,0 +1,239 @@
+import copy
+import time
+
+from bitmap_index import bitmap
+from indexed_filter import access_path
+from ocp import (
+    AndSpecification,
+    AndSpecificationWorse,
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    Size,
+    SizeSpecification,
+    Specification,
+)
+from product_table import mask
+
+# Note. Profiling is opt-in: `Profiler.instrument` returns a copy of the
+# specification where each node is wrapped in a `ProfiledSpecification`.
+# The specifications that are not instrumented are not changed, so they
+# don't pay any cost.
+#
+# The index lookups (`access_path`, `bitmap` and `mask`) see through the
+# profiled nodes, so the plan doesn't change when it's profiled. The nodes
+# answered by an index don't record any call.
+
+
+def children(spec):
+    """
+    Returns:
+        The attribute names and values of the specifications a specification
+        is made of, for example, the `args` of an `AndSpecification`.
+    """
+    result = {}
+    for name, value in vars(spec).items():
+        if isinstance(value, Specification):
+            result[name] = value
+        elif isinstance(value, tuple) and value \
+                and all(isinstance(v, Specification) for v in value):
+            result[name] = value
+    return result
+
+
+def label(spec):
+    if children(spec):
+        return type(spec).__name__
+    return repr(spec)
+
+
+class NodeStatistics:
+    def __init__(self):
+        self.calls = 0
+        self.passed = 0
+        self.timed_calls = 0
+        self.timed_seconds = 0.0
+
+    @property
+    def pass_rate(self):
+        return self.passed / self.calls if self.calls else 0.0
+
+    @property
+    def seconds(self):
+        """
+        Estimated total time, from the time of the sampled calls.
+        """
+        if not self.timed_calls:
+            return 0.0
+        return self.timed_seconds * self.calls / self.timed_calls
+
+
+class ProfiledSpecification(Specification):
+    """
+    Counts the calls and the items that satisfy the specification, and
+    measures the time of one of each `sample_every` calls.
+    """
+    def __init__(self, spec, statistics, sample_every):
+        self.spec = spec
+        self.statistics = statistics
+        self.sample_every = sample_every
+
+    def is_satisfied(self, item):
+        statistics = self.statistics
+        statistics.calls += 1
+        if statistics.calls % self.sample_every:
+            satisfied = self.spec.is_satisfied(item)
+        else:
+            start = time.perf_counter()
+            satisfied = self.spec.is_satisfied(item)
+            statistics.timed_seconds += time.perf_counter() - start
+            statistics.timed_calls += 1
+        if satisfied:
+            statistics.passed += 1
+        return satisfied
+
+    def __repr__(self):
+        return f'Profiled({self.spec!r})'
+
+
+class ProfiledAndSpecification(ProfiledSpecification, AndSpecification):
+    """
+    Profiled `AndSpecification` or `AndSpecificationWorse`. Its `args` are
+    the profiled children, so the planners can split it in conjuncts (see
+    `ocp.conjuncts`).
+    """
+    def __init__(self, spec, statistics, sample_every):
+        super().__init__(spec, statistics, sample_every)
+        if isinstance(spec, AndSpecificationWorse):
+            self.args = (spec.spec1, spec.spec2)
+        else:
+            self.args = spec.args
+
+    # It checks the same items as an `AndSpecification`, so it can be split
+    # in conjuncts (see `ocp.is_plain`).
+    checks_like = AndSpecification
+
+    # Compiled as a call, not as the `and` of the children, so the node
+    # records its statistics.
+    expression = Specification.expression
+
+
+@access_path.register
+def _(spec: ProfiledSpecification, catalog):
+    return access_path(spec.spec, catalog)
+
+
+@bitmap.register
+def _(spec: ProfiledSpecification, index):
+    return bitmap(spec.spec, index)
+
+
+@mask.register
+def _(spec: ProfiledSpecification, table):
+    return mask(spec.spec, table)
+
+
+class Profiler:
+    """
+    Collects the statistics of each node of the instrumented specifications.
+
+    The nodes are identified by their path from the root, a tuple of labels.
+    """
+    def __init__(self, sample_every=100):
+        self.sample_every = sample_every
+        self.nodes = {}
+        self.filters = {}
+
+    def instrument(self, spec, path=()):
+        """
+        Returns:
+            A copy of the specification whose nodes record their statistics.
+        """
+        path = path + (label(spec),)
+        statistics = self.nodes.setdefault(path, NodeStatistics())
+        instrumented = copy.copy(spec)
+        for name, value in children(spec).items():
+            if isinstance(value, tuple):
+                value = tuple(self.instrument(child, path) for child in value)
+            else:
+                value = self.instrument(value, path)
+            setattr(instrumented, name, value)
+        if isinstance(spec, (AndSpecification, AndSpecificationWorse)):
+            return ProfiledAndSpecification(instrumented, statistics, self.sample_every)
+        return ProfiledSpecification(instrumented, statistics, self.sample_every)
+
+    def report(self):
+        """
+        Returns:
+            A table with a line per node.
+        """
+        lines = [f'{"calls":>10} {"pass rate":>9} {"seconds":>9}  node']
+        for path, statistics in self.nodes.items():
+            lines.append(
+                f'{statistics.calls:>10} {statistics.pass_rate:>9.1%} '
+                f'{statistics.seconds:>9.4f}  {"  " * (len(path) - 1)}{path[-1]}')
+        for name, statistics in self.filters.items():
+            lines.append(
+                f'{statistics.calls:>10} {"":>9} {statistics.seconds:>9.4f}  '
+                f'{name} ({statistics.passed} items)')
+        return '\n'.join(lines)
+
+    def folded_stacks(self):
+        """
+        Returns:
+            The estimated time of each node, without the time of its
+            children, in microseconds, with the format of the flame graph
+            tools: a line per node with the path separated by `;`.
+        """
+        exclusive = {path: s.seconds for path, s in self.nodes.items()}
+        for path, statistics in self.nodes.items():
+            if len(path) > 1 and path[:-1] in exclusive:
+                exclusive[path[:-1]] -= statistics.seconds
+        return '\n'.join(
+            f'{";".join(path)} {max(0, round(seconds * 1e6))}'
+            for path, seconds in exclusive.items())
+
+
+class ProfiledFilter(Filter):
+    """
+    Filters with another filter and an instrumented specification. The time
+    of the filter is measured when the results are requested.
+    """
+    def __init__(self, profiler, filter=None):
+        self.profiler = profiler
+        self.profiled_filter = filter or BetterFilter()
+
+    def filter(self, items, spec):
+        name = type(self.profiled_filter).__name__
+        statistics = self.profiler.filters.setdefault(name, NodeStatistics())
+        # All the filter calls are timed.
+        statistics.calls += 1
+        statistics.timed_calls += 1
+        results = iter(self.profiled_filter.filter(items, self.profiler.instrument(spec)))
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(results)
+            except StopIteration:
+                return
+            finally:
+                statistics.timed_seconds += time.perf_counter() - start
+            statistics.passed += 1
+            yield item
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    products = create_products(100_000)
+    spec = NameSpecification("house") & (
+        SizeSpecification(Size.LARGE) | ~ColorSpecification(Color.RED))
+
+    profiler = Profiler()
+    list(ProfiledFilter(profiler).filter(products, spec))
+    print(profiler.report())
+    print()
+    print(profiler.folded_stacks())
@@ -0,0 +1,348 @@
+from collections import deque
+from heapq import merge
+from itertools import islice
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+import zlib
+
+from indexed_filter import IndexedProductCatalog
+from ocp import (
+    AndSpecification,
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    NameSpecification,
+    Size,
+    SizeSpecification,
+    conjuncts,
+)
+from planner import PlannedFilter, QueryPlanner
+from spec_codec import PlanCache, encode
+
+# Note. The products are split between worker processes (shards), each one
+# with its own `IndexedProductCatalog`. The requests are sent to the shards
+# through pipes and the results are merged in the main process.
+
+BATCH_SIZE = 1000
+
+
+def shard_main(connection):
+    """
+    Runs in each shard process until it receives `('stop',)`.
+
+    The products keep the id given by the main process, so the shards can
+    return them ordered by id. If a request fails, the exception is sent
+    with `('error', exception)` as the reply, or with the reply of the next
+    request if it has no reply (`add` and `remove`).
+    """
+    catalog = IndexedProductCatalog()
+    # Id in the main process of each id of the shard catalog, and the
+    # opposite.
+    global_ids = {}
+    local_ids = {}
+    # The requests come from the process that started the shard, so
+    # pickled specifications are allowed.
+    specs = PlanCache(allow_pickle=True)
+    planner = QueryPlanner()
+    planned_filter = PlannedFilter(planner)
+    error = None
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            # The main process has closed the pipe.
+            return
+        except Exception as exception:
+            error = exception
+            continue
+        command = request[0]
+        if command == 'stop':
+            return
+        try:
+            if error is not None and command in ('filter', 'count'):
+                raise error
+            if command == 'add':
+                for global_id, product in request[1]:
+                    local_id = catalog.add(product)
+                    local_ids[global_id] = local_id
+                    global_ids[local_id] = global_id
+            elif command == 'remove':
+                del global_ids[local_ids[request[1]]]
+                catalog.remove(local_ids.pop(request[1]))
+            elif command == 'filter':
+                spec = specs.get('spec', request[1], lambda spec: spec)
+                limit = request[2]
+                plan = planner.plan(catalog, spec)
+                ids = islice(plan.matching_ids(catalog), limit)
+                while True:
+                    batch = [
+                        (global_ids[local_id], catalog.products[local_id])
+                        for local_id in islice(ids, BATCH_SIZE)
+                    ]
+                    if not batch:
+                        break
+                    connection.send(('rows', batch))
+                connection.send(('end',))
+            elif command == 'count':
+                spec = specs.get('spec', request[1], lambda spec: spec)
+                connection.send(('count', planned_filter.count(catalog, spec)))
+        except Exception as exception:
+            if command in ('filter', 'count'):
+                error = None
+                connection.send(('error', exception))
+            else:
+                error = exception
+
+
+class ShardedCatalog:
+    """
+    Catalog with the products split between `shards` processes by the hash
+    of their lower-cased name, so the products with the same name are in
+    the same shard.
+    """
+    def __init__(self, products=(), shards=4):
+        self.connections = []
+        self.processes = []
+        for _ in range(shards):
+            connection, shard_connection = Pipe()
+            process = Process(target=shard_main, args=(shard_connection,), daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.shard_of = {}
+        self.open_replies = []
+        self._next_id = 0
+        self.add_all(products)
+
+    def __len__(self):
+        return len(self.shard_of)
+
+    def __iter__(self):
+        return self.filter(AndSpecification())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for replies in self.open_replies:
+            replies.discard()
+        for connection, process in zip(self.connections, self.processes):
+            connection.send(('stop',))
+            process.join()
+            connection.close()
+
+    def _shard(self, name):
+        return zlib.crc32(name.lower().encode()) % len(self.connections)
+
+    def add_all(self, products):
+        """
+        Returns:
+            The ids assigned to the products.
+        """
+        batches = [[] for _ in self.connections]
+        ids = []
+        for product in products:
+            product_id = self._next_id
+            self._next_id += 1
+            shard = self._shard(product.name)
+            self.shard_of[product_id] = shard
+            batches[shard].append((product_id, product))
+            ids.append(product_id)
+        for connection, batch in zip(self.connections, batches):
+            if batch:
+                connection.send(('add', batch))
+        return ids
+
+    def add(self, product):
+        return self.add_all([product])[0]
+
+    def remove(self, product_id):
+        shard = self.shard_of.pop(product_id)
+        self.connections[shard].send(('remove', product_id))
+
+    def _shards_for(self, spec):
+        """
+        Returns:
+            The connections of the shards that can have products that satisfy
+            the specification.
+        """
+        for conjunct in conjuncts(spec):
+            if isinstance(conjunct, NameSpecification):
+                return [self.connections[self._shard(conjunct.name)]]
+        return self.connections
+
+    def _request(self, connections, request):
+        """
+        Sends a request to the shards. The replies of the open `filter`
+        results are read before, so the replies of each request are
+        received in order.
+        """
+        for replies in self.open_replies:
+            replies.buffer()
+        self.open_replies = []
+        for connection in connections:
+            connection.send(request)
+
+    def filter(self, spec, ordered=True, limit=None):
+        """
+        Yields:
+            The products that satisfy the specification. If `ordered`, in the
+            order they were added, else as the shards return them.
+        """
+        connections = self._shards_for(spec)
+        self._request(connections, ('filter', encode(spec, allow_pickle=True), limit))
+        replies = ShardReplies(connections)
+        self.open_replies.append(replies)
+        try:
+            if ordered:
+                streams = [replies.products(c) for c in connections]
+                results = (product for _, product in merge(*streams))
+            else:
+                results = replies.unordered()
+            yield from islice(results, limit)
+        finally:
+            # If we stop before the end, the rest is read so the pipes are
+            # ready for the next request.
+            replies.discard()
+
+    def count(self, spec):
+        connections = self._shards_for(spec)
+        self._request(connections, ('count', encode(spec, allow_pickle=True)))
+        # All the replies are read before raising, so the pipes are ready
+        # for the next request.
+        replies = [connection.recv() for connection in connections]
+        for reply in replies:
+            if reply[0] == 'error':
+                raise reply[1]
+        return sum(count for _, count in replies)
+
+
+class ShardReplies:
+    """
+    Replies of the shards to a `filter` request: batches of (id, product)
+    tuples until `('end',)` or `('error', exception)`.
+
+    The batches are read from the pipes as they are needed. Before another
+    request is sent, `buffer` reads the rest of them. The exception of a
+    shard is raised when its batches are read.
+    """
+    def __init__(self, connections):
+        # Shards that haven't sent 'end' or 'error' yet.
+        self.pending = set(connections)
+        self.buffered = {connection: deque() for connection in connections}
+
+    def _messages(self, connection):
+        """
+        Yields the messages of a shard until the last one, included.
+        """
+        while True:
+            message = connection.recv()
+            yield message
+            if message[0] != 'rows':
+                return
+
+    def buffer(self):
+        for connection in self.pending:
+            self.buffered[connection].extend(self._messages(connection))
+        self.pending.clear()
+
+    def discard(self):
+        for connection in self.pending:
+            for _ in self._messages(connection):
+                pass
+        self.pending.clear()
+        self.buffered.clear()
+
+    def _next_batch(self, connection):
+        """
+        Returns:
+            The next batch of the shard, or None after the last one.
+        """
+        buffered = self.buffered[connection]
+        if buffered:
+            message = buffered.popleft()
+        elif connection in self.pending:
+            message = connection.recv()
+            if message[0] != 'rows':
+                self.pending.discard(connection)
+        else:
+            return None
+        if message[0] == 'error':
+            raise message[1]
+        if message[0] == 'end':
+            return None
+        return message[1]
+
+    def products(self, connection):
+        """
+        Yields:
+            The (id, product) tuples of a shard.
+        """
+        while (batch := self._next_batch(connection)) is not None:
+            yield from batch
+
+    def unordered(self):
+        """
+        Yields:
+            The products of all the shards, as they are received.
+        """
+        while True:
+            for connection, buffered in self.buffered.items():
+                while buffered:
+                    for _, product in self._next_batch(connection) or ():
+                        yield product
+            if not self.pending:
+                return
+            for connection in wait(list(self.pending)):
+                # The replies may have been buffered while we were yielding.
+                if connection in self.pending:
+                    for _, product in self._next_batch(connection) or ():
+                        yield product
+
+
+class ShardedFilter(Filter):
+    """
+    Filters a `ShardedCatalog`. The shards filter their products in
+    parallel; `first` and `exists` only ask each shard for the products
+    they need.
+    """
+    def __init__(self, ordered=True):
+        self.ordered = ordered
+
+    def filter(self, items, spec):
+        if not isinstance(items, ShardedCatalog):
+            return BetterFilter().filter(items, spec)
+        return items.filter(spec, ordered=self.ordered)
+
+    def first(self, items, spec, n):
+        if not isinstance(items, ShardedCatalog):
+            return BetterFilter().first(items, spec, n)
+        return list(items.filter(spec, ordered=self.ordered, limit=n))
+
+    def count(self, items, spec):
+        if not isinstance(items, ShardedCatalog):
+            return BetterFilter().count(items, spec)
+        return items.count(spec)
+
+    def exists(self, items, spec):
+        if not isinstance(items, ShardedCatalog):
+            return BetterFilter().exists(items, spec)
+        # With a limit, each shard only sends one product.
+        return any(True for _ in items.filter(spec, ordered=False, limit=1))
+
+
+if __name__ == "__main__":
+
+    from benchmark import create_products
+
+    with ShardedCatalog(create_products(100_000), shards=4) as catalog:
+        sharded_filter = ShardedFilter()
+        large_blue = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+        print(f'Large blue products: {sharded_filter.count(catalog, large_blue)}')
+        print('First large blue houses:')
+        for p in sharded_filter.first(catalog, large_blue & NameSpecification("house"), 3):
+            print(f' - {p.name} {p.color.name} {p.size.name}')
@@ -0,0 +1,172 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from bitmap_index import bitmap
+from indexed_filter import access_path
+from ocp import (
+    AndSpecification,
+    BetterFilter,
+    Color,
+    ColorSpecification,
+    Filter,
+    Product,
+    Size,
+    Specification,
+    conjuncts,
+    constant,
+)
+from product_table import mask
+
+# Note. `Size` members are ordered by their value: SMALL < MEDIUM < LARGE.
+
+
+class SizeRangeSpecification(Specification):
+    """
+    The size is between `min_size` and `max_size`, both included. A limit
+    that is None is not checked.
+    """
+    def __init__(self, min_size=None, max_size=None):
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def sizes(self):
+        """
+        Returns:
+            The `Size` members in the range, ordered.
+        """
+        return [size for size in Size if self._contains(size)]
+
+    def _contains(self, size):
+        return (self.min_size is None or self.min_size.value <= size.value) \
+            and (self.max_size is None or size.value <= self.max_size.value)
+
+    def is_satisfied(self, item):
+        return self._contains(item.size)
+
+    def expression(self, constants):
+        return f"item.size in {constant(constants, frozenset(self.sizes()))}"
+
+
+class SizeAtLeastSpecification(SizeRangeSpecification):
+    def __init__(self, size):
+        super().__init__(min_size=size)
+
+
+class SizeAtMostSpecification(SizeRangeSpecification):
+    def __init__(self, size):
+        super().__init__(max_size=size)
+
+
+# The indexes of the other modules answer the ranges with the sizes in them.
+
+@access_path.register
+def _(spec: SizeRangeSpecification, catalog):
+    ids = set()
+    for size in spec.sizes():
+        ids |= catalog.size_index.get(size, set())
+    return ids
+
+
+@bitmap.register
+def _(spec: SizeRangeSpecification, index):
+    result = 0
+    for size in spec.sizes():
+        result |= index.size_bitmap(size)
+    return result
+
+
+@mask.register
+def _(spec: SizeRangeSpecification, table):
+    translation = bytearray(256)
+    for size in spec.sizes():
+        translation[size.value] = 1
+    return table.sizes.translate(translation)
+
+
+class SortedSizeIndex:
+    """
+    Keeps the products sorted by size, so the products of a size range are
+    a contiguous slice that we find with `bisect`.
+    """
+    def __init__(self, products=()):
+        products = sorted(products, key=lambda p: p.size.value)
+        self.products = products
+        self.sizes = array('B', (p.size.value for p in products))
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def insert(self, product):
+        position = bisect_right(self.sizes, product.size.value)
+        self.sizes.insert(position, product.size.value)
+        self.products.insert(position, product)
+
+    def remove(self, product):
+        start = bisect_left(self.sizes, product.size.value)
+        end = bisect_right(self.sizes, product.size.value)
+        for position in range(start, end):
+            if self.products[position] is product:
+                del self.sizes[position]
+                del self.products[position]
+                return
+        raise ValueError(product)
+
+    def range(self, min_size=None, max_size=None):
+        """
+        Returns:
+            The products with a size in the range, ordered by size.
+        """
+        start = 0 if min_size is None else bisect_left(self.sizes, min_size.value)
+        end = len(self) if max_size is None else bisect_right(self.sizes, max_size.value)
+        return self.products[start:end]
+
+
+class SortedSizeFilter(Filter):
+    """
+    Filters a `SortedSizeIndex`. The results are ordered by size.
+
+    If a size range must be satisfied, only the products in the range are
+    checked against the rest of the specification.
+    """
+    def filter(self, items, spec):
+        """
+        Args:
+            items: a `SortedSizeIndex`.
+            spec: specification. See `Specification` class.
+        """
+        ranges = []
+        residual = []
+        for conjunct in conjuncts(spec):
+            if isinstance(conjunct, SizeRangeSpecification):
+                ranges.append(conjunct)
+            else:
+                residual.append(conjunct)
+        if not ranges:
+            return BetterFilter().filter(items, spec)
+        # The intersection of the ranges is a range too.
+        sizes = set(Size)
+        for conjunct in ranges:
+            sizes &= set(conjunct.sizes())
+        if not sizes:
+            return iter(())
+        sizes = sorted(sizes, key=lambda size: size.value)
+        candidates = items.range(sizes[0], sizes[-1])
+        return BetterFilter().filter(candidates, AndSpecification(*residual))
+
+
+if __name__ == "__main__":
+
+    index = SortedSizeIndex([
+        Product('House', Color.BLUE, Size.LARGE),
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+        Product('Chair', Color.BLUE, Size.MEDIUM),
+    ])
+    print('Green or blue products of medium size or larger:')
+    spec = SizeAtLeastSpecification(Size.MEDIUM) \
+        & (ColorSpecification(Color.BLUE) | ColorSpecification(Color.GREEN))
+    for p in SortedSizeFilter().filter(index, spec):
+        print(f' - {p.name} ({p.size.name})')
@@ -0,0 +1,269 @@
+from collections import OrderedDict
+import pickle
+
+from ocp import (
+    AndSpecification,
+    AndSpecificationWorse,
+    Color,
+    ColorSpecification,
+    NameSpecification,
+    NotSpecification,
+    OrSpecification,
+    Size,
+    SizeSpecification,
+    conjuncts,
+)
+
+# Note. Compact binary encoding of specifications, smaller and faster to
+# create than a pickle.
+#
+# Format: version byte, number of strings, the strings (length and UTF-8
+# bytes) and the specification tree as opcodes in prefix order. Each string
+# is stored once and referenced by its position. The numbers are varints.
+# The same specification always has the same encoding, so it can be used as
+# a cache key in any process (unlike `hash`, that changes between processes).
+#
+# Specifications without a registered opcode can only be encoded as a pickle
+# with `allow_pickle=True`. Decoding a pickle can run any code, so it must
+# only be allowed for data of trusted processes, for example, the workers
+# started by `ParallelFilter`.
+
+VERSION = 1
+PICKLE_OPCODE = 0
+
+
+class Writer:
+    def __init__(self, codec, allow_pickle=False):
+        self.codec = codec
+        self.allow_pickle = allow_pickle
+        self.strings = {}
+        self.data = bytearray()
+
+    def byte(self, value):
+        self.data.append(value)
+
+    def varint(self, value):
+        while value >= 0x80:
+            self.data.append(value & 0x7F | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def string(self, value):
+        self.varint(self.strings.setdefault(value, len(self.strings)))
+
+    def spec(self, spec):
+        self.codec.write(self, spec)
+
+    def getvalue(self):
+        header = Writer(self.codec)
+        header.byte(VERSION)
+        header.varint(len(self.strings))
+        for string in self.strings:
+            encoded = string.encode()
+            header.varint(len(encoded))
+            header.data += encoded
+        return bytes(header.data + self.data)
+
+
+class Reader:
+    def __init__(self, codec, data, allow_pickle=False):
+        self.codec = codec
+        self.allow_pickle = allow_pickle
+        self.data = memoryview(data)
+        self.position = 0
+        if self.byte() != VERSION:
+            raise ValueError('Unknown specification encoding version')
+        self.strings = []
+        for _ in range(self.varint()):
+            self.strings.append(str(self.bytes(self.varint()), 'utf-8'))
+
+    def byte(self):
+        value = self.data[self.position]
+        self.position += 1
+        return value
+
+    def bytes(self, length):
+        value = self.data[self.position:self.position + length]
+        self.position += length
+        return value
+
+    def varint(self):
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def string(self):
+        return self.strings[self.varint()]
+
+    def spec(self):
+        return self.codec.read(self)
+
+
+class SpecificationCodec:
+    """
+    Encodes and decodes specifications with the functions registered for
+    each class.
+    """
+    def __init__(self):
+        self.encoders = {}
+        self.decoders = {}
+
+    def register(self, spec_class, opcode, encode, decode):
+        """
+        Args:
+            spec_class: the specification class. Subclasses are not included.
+            opcode: number from 1 to 255 that identifies the class.
+            encode: function that receives the specification and a `Writer`.
+            decode: function that receives a `Reader` and returns the
+                specification.
+        """
+        self.encoders[spec_class] = opcode, encode
+        self.decoders[opcode] = decode
+
+    def encode(self, spec, allow_pickle=False):
+        """
+        Args:
+            allow_pickle: pickle the specifications without a registered
+                class, else `TypeError` is raised.
+        """
+        writer = Writer(self, allow_pickle)
+        writer.spec(spec)
+        return writer.getvalue()
+
+    def decode(self, data, allow_pickle=False):
+        """
+        Args:
+            allow_pickle: decode the pickled specifications, else
+                `ValueError` is raised. Only for data of trusted processes.
+        """
+        return Reader(self, data, allow_pickle).spec()
+
+    def write(self, writer, spec):
+        if type(spec) not in self.encoders:
+            if not writer.allow_pickle:
+                raise TypeError(f'{type(spec).__name__} has no registered opcode')
+            writer.byte(PICKLE_OPCODE)
+            data = pickle.dumps(spec)
+            writer.varint(len(data))
+            writer.data += data
+            return
+        opcode, encode = self.encoders[type(spec)]
+        writer.byte(opcode)
+        encode(spec, writer)
+
+    def read(self, reader):
+        opcode = reader.byte()
+        if opcode == PICKLE_OPCODE:
+            if not reader.allow_pickle:
+                raise ValueError('Pickled specifications are not allowed')
+            return pickle.loads(reader.bytes(reader.varint()))
+        if opcode not in self.decoders:
+            raise ValueError(f'Unknown specification opcode {opcode}')
+        return self.decoders[opcode](reader)
+
+
+def write_children(children, writer):
+    writer.varint(len(children))
+    for child in children:
+        writer.spec(child)
+
+
+def read_children(reader):
+    return [reader.spec() for _ in range(reader.varint())]
+
+
+codec = SpecificationCodec()
+codec.register(
+    ColorSpecification, 1,
+    lambda spec, writer: writer.byte(spec.color.value),
+    lambda reader: ColorSpecification(Color(reader.byte())))
+codec.register(
+    SizeSpecification, 2,
+    lambda spec, writer: writer.byte(spec.size.value),
+    lambda reader: SizeSpecification(Size(reader.byte())))
+codec.register(
+    NameSpecification, 3,
+    lambda spec, writer: writer.string(spec.name),
+    lambda reader: NameSpecification(reader.string()))
+# Nested `AndSpecification`s and `AndSpecificationWorse`s are encoded as a
+# single `AndSpecification` of their conjuncts, so a long chain of `&` is
+# not a deep tree (the codec is recursive).
+codec.register(
+    AndSpecification, 4,
+    lambda spec, writer: write_children(conjuncts(spec), writer),
+    lambda reader: AndSpecification(*read_children(reader)))
+codec.register(
+    AndSpecificationWorse, 5,
+    lambda spec, writer: write_children(conjuncts(spec), writer),
+    lambda reader: AndSpecification(*read_children(reader)))
+codec.register(
+    OrSpecification, 6,
+    lambda spec, writer: write_children(spec.args, writer),
+    lambda reader: OrSpecification(*read_children(reader)))
+codec.register(
+    NotSpecification, 7,
+    lambda spec, writer: writer.spec(spec.spec),
+    lambda reader: NotSpecification(reader.spec()))
+
+
+def encode(spec, allow_pickle=False):
+    return codec.encode(spec, allow_pickle)
+
+
+def decode(data, allow_pickle=False):
+    return codec.decode(data, allow_pickle)
+
+
+class PlanCache:
+    """
+    Remembers what has been built for the last specifications used, for
+    example, compiled predicates or query plans, keyed by their encoding.
+    """
+    def __init__(self, max_size=256, allow_pickle=False):
+        """
+        Args:
+            allow_pickle: decode pickled specifications, see `decode`.
+        """
+        self.max_size = max_size
+        self.allow_pickle = allow_pickle
+        self.cache = OrderedDict()
+
+    def get(self, kind, encoded, build):
+        """
+        Args:
+            kind: name of what is built, for example `'predicate'`.
+            encoded: the encoded specification.
+            build: function that receives the decoded specification and
+                returns the value to cache.
+        """
+        key = kind, encoded
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        value = self.cache[key] = build(decode(encoded, self.allow_pickle))
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return value
+
+    def predicate(self, encoded):
+        """
+        Returns:
+            The compiled specification. See `Specification.compile`.
+        """
+        return self.get('predicate', encoded, lambda spec: spec.compile())
+
+
+if __name__ == "__main__":
+
+    large = SizeSpecification(Size.LARGE)
+    spec = large & ColorSpecification(Color.BLUE) & NameSpecification("house") \
+        | ~large & NameSpecification("house")
+
+    encoded = encode(spec)
+    print(f'Encoded: {len(encoded)} bytes, pickled: {len(pickle.dumps(spec))} bytes')
+    # The `&` chains are decoded as a single `AndSpecification`.
+    print(f'Decoded: {decode(encoded)!r}')